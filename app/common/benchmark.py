@@ -0,0 +1,263 @@
+import contextlib
+import json
+import math
+import random
+import time
+from typing import Any, Callable, Dict, List
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils.module_loading import import_string
+from graphql_jwt.shortcuts import get_token
+from common.cache import uncached
+from common.datagen import refresh_derived_data
+
+BENCH_EMAIL_DOMAIN = 'bench.example'
+BENCH_PASSWORD = 'bench-password'
+BATCH_SIZE = 1000
+
+
+# ---------------- Dataset ----------------
+def bench_users():
+    from users.models import User
+    return User.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}')
+
+
+def clear_dataset() -> None:
+    """Delete the benchmark dataset; related rows go with their users and products."""
+    from associations.models import Artisan, Association
+    from products.models import Product
+    users = bench_users()
+    owner_ids = [*Artisan.objects.filter(user__in=users).values_list('user_id', flat=True),
+                 *Association.objects.filter(admin__in=users).values_list('id', flat=True)]
+    Product.objects.filter(owner_id__in=owner_ids).delete()
+    users.delete()
+
+
+def seed_dataset(products: int, seed: int = 0) -> Dict[str, int]:
+    """Create a benchmark dataset scaled on the number of products.
+
+    Every other volume is derived from the product count, so runs with the
+    same size and seed produce the same shape of data.
+    """
+    from associations.models import Artisan, Association
+    from cart.models import Cart, CartItem
+    from orders.models import Order, OrderItem
+    from products.favorite_model import Favorite
+    from products.models import Category, Product, ProductImage, ProductTranslation
+    from products.review_model import Review
+    from users.models import User
+    from users.utils import hash_password
+
+    rng = random.Random(seed)
+    password = hash_password(BENCH_PASSWORD)
+    buyer_count = max(products // 10, 5)
+    artisan_count = max(products // 20, 2)
+    association_count = max(products // 200, 1)
+
+    def users(role, count):
+        return User.objects.bulk_create([
+            User(name=f'{role} {i}', email=f'{role}{i}@{BENCH_EMAIL_DOMAIN}', role=role, password=password)
+            for i in range(count)
+        ], batch_size=BATCH_SIZE)
+
+    with transaction.atomic():
+        buyers = users('buyer', buyer_count)
+        admins = users('association_admin', association_count)
+        associations = Association.objects.bulk_create([
+            Association(name=f'Association {i}', description='Benchmark association', email=admin.email,
+                        phone='0000000000', admin=admin)
+            for i, admin in enumerate(admins)
+        ], batch_size=BATCH_SIZE)
+        artisans = Artisan.objects.bulk_create([
+            Artisan(user=user, association=rng.choice(associations + [None]), bio='Benchmark artisan')
+            for user in users('artisan', artisan_count)
+        ], batch_size=BATCH_SIZE)
+        categories = list(Category.objects.all()[:20]) or Category.objects.bulk_create(
+            [Category(name=f'Category {i}') for i in range(20)])
+
+        owners = [('artisan', artisan.user_id) for artisan in artisans] + \
+                 [('association', association.id) for association in associations]
+        product_rows = []
+        for i in range(products):
+            owner_type, owner_id = rng.choice(owners)
+            product_rows.append(Product(
+                title=f'Handmade item {i}', description=f'Handmade benchmark item number {i}',
+                price=round(rng.uniform(5, 800), 2), stock_quantity=10 ** 6,
+                owner_type=owner_type, owner_id=owner_id, category=rng.choice(categories),
+                status=rng.choice(['approved', 'approved', 'approved', 'pending', 'rejected']),
+            ))
+        product_rows = Product.objects.bulk_create(product_rows, batch_size=BATCH_SIZE)
+
+        ProductTranslation.objects.bulk_create([
+            ProductTranslation(product=product, language_code=language, title=f'{product.title} ({language})',
+                               description=product.description)
+            for product in product_rows for language in ('fr', 'ar')
+        ], batch_size=BATCH_SIZE)
+        ProductImage.objects.bulk_create([
+            ProductImage(product=product, image_url=f'https://images.{BENCH_EMAIL_DOMAIN}/{product.id}/{n}.jpg')
+            for product in product_rows for n in range(2)
+        ], batch_size=BATCH_SIZE)
+
+        carts = Cart.objects.bulk_create([Cart(user=buyer) for buyer in buyers], batch_size=BATCH_SIZE)
+        cart_items, favorites, reviews, orders, order_items = [], [], [], [], []
+        for buyer, cart in zip(buyers, carts):
+            picks = rng.sample(product_rows, min(len(product_rows), 5))
+            cart_items += [CartItem(cart=cart, product=product, quantity=rng.randint(1, 3), price_at_add=product.price)
+                           for product in picks]
+            favorites += [Favorite(buyer=buyer, product=product) for product in picks]
+            reviews += [Review(buyer=buyer, product=product, rating=rng.randint(1, 5), comment='Benchmark review')
+                        for product in picks]
+            for _ in range(2):
+                order = Order(buyer=buyer, total_amount=0, shipping_address='1 Benchmark Street')
+                items = [OrderItem(order=order, product=product, quantity=1, unit_price=product.price)
+                         for product in rng.sample(product_rows, min(len(product_rows), 3))]
+                order.total_amount = sum(item.unit_price for item in items)
+                orders.append(order)
+                order_items += items
+        CartItem.objects.bulk_create(cart_items, batch_size=BATCH_SIZE)
+        Favorite.objects.bulk_create(favorites, batch_size=BATCH_SIZE)
+        Review.objects.bulk_create(reviews, batch_size=BATCH_SIZE)
+        Order.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+        OrderItem.objects.bulk_create(order_items, batch_size=BATCH_SIZE)
+
+    refresh_derived_data([product.id for product in product_rows])
+    return {
+        'buyers': len(buyers), 'artisans': len(artisans), 'associations': len(associations),
+        'products': len(product_rows), 'orders': len(orders), 'reviews': len(reviews),
+    }
+
+
+# ---------------- Scenarios ----------------
+def fixtures() -> Dict[str, Any]:
+    """Pick the records benchmark operations run against."""
+    from products.models import Product
+    buyer = bench_users().filter(role='buyer').order_by('email').first()
+    product = Product.objects.filter(status='approved', title__startswith='Handmade item').order_by('-rating_count', 'id').first()
+    if buyer is None or product is None:
+        raise RuntimeError('No benchmark dataset found, seed it first')
+    return {'buyer': buyer, 'product': product}
+
+
+SCENARIOS: Dict[str, Callable[[Dict[str, Any]], dict]] = {
+    'allProducts': lambda f: {
+        'query': '''query($pagination: PaginationInput) { allProducts(pagination: $pagination) {
+            products { id title price owner category { name } translations { languageCode title } images { imageUrl } }
+            pageInfo { hasNextPage totalCount } } }''',
+        'variables': {'pagination': {'pageSize': 20}},
+    },
+    'product': lambda f: {
+        'query': '''query($id: UUID!) { product(id: $id) {
+            id title description price owner ratingAvg category { name } translations { title } images { imageUrl } } }''',
+        'variables': {'id': str(f['product'].id)},
+    },
+    'myCart': lambda f: {
+        'query': '{ myCart { id items { quantity priceAtAdd product { id title price } } } }',
+        'user': f['buyer'],
+    },
+    'createOrder': lambda f: {
+        'query': '''mutation($buyerId: UUID!, $items: [OrderItemInput]!) {
+            createOrder(buyerId: $buyerId, shippingAddress: "1 Benchmark Street", items: $items) {
+                order { id totalAmount items { quantity unitPrice } } } }''',
+        'variables': {'buyerId': str(f['buyer'].id), 'items': [
+            {'productId': str(f['product'].id), 'quantity': 1, 'unitPrice': f['product'].price}]},
+        'user': f['buyer'],
+        'mutation': True,
+    },
+    'allOrders': lambda f: {
+        'query': '''{ allOrders(pagination: {pageSize: 20}) {
+            orders { id totalAmount status buyer { name } items { quantity product { title } } } } }''',
+    },
+    'allFavorites': lambda f: {
+        'query': '''query($buyerId: UUID!) { allFavorites(buyerId: $buyerId) {
+            favorites { id product { id title price } } } }''',
+        'variables': {'buyerId': str(f['buyer'].id)},
+    },
+    'allReviews': lambda f: {
+        'query': 'query($productId: UUID!) { allReviews(productId: $productId) { id rating comment buyer { name } } }',
+        'variables': {'productId': str(f['product'].id)},
+    },
+    'loginUser': lambda f: {
+        'query': '''mutation($email: String!, $password: String!) {
+            loginUser(email: $email, password: $password) { token } }''',
+        'variables': {'email': f['buyer'].email, 'password': BENCH_PASSWORD},
+        'mutation': True,
+    },
+}
+
+
+def graphql_request(user=None):
+    """Request used as GraphQL context, authenticated with a JWT when user is given."""
+    request = RequestFactory().post('/graphql/')
+    request.user = AnonymousUser()
+    if user is not None:
+        request.META['HTTP_AUTHORIZATION'] = f'JWT {get_token(user)}'
+    return request
+
+
+def graphene_middleware():
+    """Instances of the middleware configured in GRAPHENE['MIDDLEWARE']."""
+    return [import_string(path)() for path in settings.GRAPHENE.get('MIDDLEWARE', [])]
+
+
+def run_scenario(name: str, spec: dict, iterations: int, warmup: int = 2, cold: bool = False) -> dict:
+    """Execute one operation repeatedly through the real schema and summarize it."""
+    from core.schema import schema
+
+    timings, query_counts = [], []
+    for iteration in range(warmup + iterations):
+        with transaction.atomic():
+            with uncached() if cold else contextlib.nullcontext(), CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                result = schema.execute(spec['query'], variable_values=spec.get('variables'),
+                                        context_value=graphql_request(spec.get('user')), middleware=graphene_middleware())
+                elapsed = time.perf_counter() - start
+            if spec.get('mutation'):
+                transaction.set_rollback(True)  # Keep the dataset identical between runs
+        if result.errors:
+            raise RuntimeError(f'{name} failed: {result.errors[0]}')
+        if iteration >= warmup:
+            timings.append(elapsed * 1000)
+            query_counts.append(len(queries.captured_queries))
+
+    return {
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': max(query_counts),
+    }
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Return regressions: higher query counts, or p95 slower than baseline by more than tolerance."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['queries'] > previous['queries']:
+            regressions.append(f"{name}: {result['queries']} queries (baseline {previous['queries']})")
+        if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']}ms (baseline {previous['p95_ms']}ms)")
+    return regressions
+
+
+def load_baseline(path: str) -> dict:
+    """Return a saved baseline: run settings plus per-operation results."""
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path: str, results: Dict[str, dict], metadata: dict) -> None:
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump({**metadata, 'results': results}, baseline_file, indent=2, sort_keys=True)
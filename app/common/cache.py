@@ -0,0 +1,77 @@
+import contextlib
+import hashlib
+import json
+import time
+from contextvars import ContextVar
+from django.core.cache import cache
+from graphene.types.unmountedtype import UnmountedType
+from typing import Any, Iterable, Iterator
+
+# Set by uncached(): cached results are neither read nor stored
+_bypass: ContextVar[bool] = ContextVar('cache_bypass', default=False)
+
+
+def get_version(name: str) -> int:
+    """Return the current value of a named cache version counter.
+
+    Counters start from the current time rather than 1, so a counter that was
+    evicted never comes back with a value older entries were keyed with.
+    """
+    return cache.get_or_set(f'version:{name}', time.time_ns, None)
+
+
+def bump_version(name: str) -> None:
+    """Advance a version counter, invalidating every entry keyed with it in O(1)."""
+    key = f'version:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def bump_versions(names: Iterable[str]) -> None:
+    for name in dict.fromkeys(names):
+        bump_version(name)
+
+
+@contextlib.contextmanager
+def uncached() -> Iterator[None]:
+    """Context manager under which get_cached always misses and set_cached stores nothing.
+
+    Only the current thread or task is affected, and version counters keep
+    working, so entries cached by other requests are left untouched.
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def get_cached(key: str) -> Any:
+    return None if _bypass.get() else cache.get(key)
+
+
+def set_cached(key: str, value: Any, timeout: int) -> None:
+    if not _bypass.get():
+        cache.set(key, value, timeout)
+
+
+def make_key(prefix: str, versions: Iterable[str], arguments: Any) -> str:
+    """Build a cache key from version counters and normalized arguments."""
+    version_part = ':'.join(str(get_version(name)) for name in versions)
+    argument_hash = hashlib.md5(json.dumps(arguments, sort_keys=True, default=str).encode()).hexdigest()
+    return f'{prefix}:{version_part}:{argument_hash}'
+
+
+def normalize_arguments(value: Any) -> Any:
+    """Reduce resolver arguments to plain JSON data, dropping unset values."""
+    if isinstance(value, dict):
+        return {key: normalize_arguments(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [normalize_arguments(item) for item in value]
+    if isinstance(value, UnmountedType):
+        return None  # Bare input objects built in Python, e.g. PaginationInput()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
@@ -0,0 +1,70 @@
+import hashlib
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+from typing import Optional
+from common.cache import bump_version, get_cached, get_version, set_cached
+
+COUNT_CACHE_TIMEOUT = getattr(settings, 'COUNT_CACHE_TIMEOUT', 300)
+COUNT_ESTIMATE_THRESHOLD = getattr(settings, 'COUNT_ESTIMATE_THRESHOLD', 100_000)
+
+# Models whose counts are cached: paginated by some query, or counted by facets
+COUNTED_MODELS = (
+    'users.User', 'associations.Association', 'associations.Artisan', 'products.Product',
+    'products.Review', 'products.Favorite', 'orders.Order', 'cart.CartItem',
+)
+
+
+def _version_name(model) -> str:
+    return f'model:{model._meta.concrete_model._meta.label_lower}'
+
+
+def get_model_version(model) -> int:
+    """Return the current write version of a model's row counts."""
+    return get_version(_version_name(model))
+
+
+def bump_model_version(model) -> None:
+    """Invalidate every cached count for a model in O(1)."""
+    bump_version(_version_name(model))
+
+
+def count_signature(queryset: QuerySet) -> str:
+    """Hash the SQL and parameters that filter a queryset."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    return hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """Return the Postgres planner's row estimate for the queryset's table."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+def cached_count(queryset: QuerySet) -> int:
+    """Count rows, reusing a cached result until the model is written to.
+
+    Unfiltered querysets over large tables use the planner estimate instead
+    of scanning the whole table. Models outside COUNTED_MODELS are counted
+    directly, since nothing invalidates their cached counts.
+    """
+    model = queryset.model
+    if model._meta.concrete_model._meta.label not in COUNTED_MODELS:
+        return queryset.count()
+    key = f'count:{model._meta.label_lower}:{get_model_version(model)}:{count_signature(queryset)}'
+    count = get_cached(key)
+    if count is None:
+        estimate = None
+        if not queryset.query.where and not queryset.query.distinct:
+            estimate = estimate_count(queryset)
+        if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+            count = estimate
+        else:
+            count = queryset.count()
+        set_cached(key, count, COUNT_CACHE_TIMEOUT)
+    return count
@@ -0,0 +1,328 @@
+"""Synthetic marketplace generator used by the generate_data command.
+
+Every row is derived from (seed, kind, index): primary keys are
+deterministic UUIDs and relations are computed from indexes, so chunks can
+be generated by independent processes in any order and still reference
+each other correctly. Each chunk is written in a single transaction, which
+makes "the chunk's last row exists" a reliable resume marker.
+"""
+import datetime
+import hashlib
+import io
+import random
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.apps import apps
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+LANGUAGES = ('fr', 'ar')
+IMAGES_PER_PRODUCT = 2
+CART_ITEMS_PER_BUYER = 3
+FAVORITES_PER_BUYER = 5
+REVIEWS_PER_BUYER = 5
+ORDERS_PER_BUYER = 2
+ITEMS_PER_ORDER = 3
+CATEGORY_COUNT = 50
+HISTORY_DAYS = 730
+
+# Units of work, generated phase by phase so foreign keys always point to committed rows
+PHASES = (('categories', 'associations', 'artisans', 'buyers'), ('products',), ('activity',))
+
+AUTO_FIELDS = ('AutoField', 'BigAutoField', 'SmallAutoField')
+
+
+def plan_volumes(products: int) -> Dict[str, int]:
+    """Row counts for each unit kind, scaled on the number of products."""
+    return {
+        'categories': CATEGORY_COUNT,
+        'associations': max(products // 200, 1),
+        'artisans': max(products // 20, 1),
+        'buyers': max(products // 5, 1),
+        'products': products,
+        'activity': max(products // 5, 1),  # One unit row per buyer
+    }
+
+
+def plan_units(volumes: Dict[str, int], chunk_size: int) -> List[List[Tuple[str, int, int]]]:
+    """Split every kind into (kind, start, end) chunks, grouped by phase."""
+    return [
+        [(kind, start, min(start + chunk_size, volumes[kind]))
+         for kind in phase for start in range(0, volumes[kind], chunk_size)]
+        for phase in PHASES
+    ]
+
+
+def copy_value(value) -> str:
+    """Format a value for COPY ... FROM STDIN in the text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def insert_rows(model, objects: List[models.Model]) -> None:
+    """Insert model instances with COPY on PostgreSQL, or a batched INSERT elsewhere.
+
+    Values are written as set on the instances, so generated timestamps are
+    kept instead of being replaced by auto_now.
+    """
+    if not objects:
+        return
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_create(objects, batch_size=1000)
+        return
+
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not (field.primary_key and field.get_internal_type() in AUTO_FIELDS)
+    ]
+    buffer = io.StringIO()
+    for obj in objects:
+        buffer.write('\t'.join(
+            copy_value(field.get_db_prep_save(getattr(obj, field.attname), connection)) for field in fields
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN', buffer)
+
+
+def refresh_derived_data(product_ids: Optional[List[Any]] = None) -> None:
+    """Rebuild data bulk inserts skip: search vectors, rating aggregates and cache versions.
+
+    Only the version counters of cached counts and listings are bumped, so
+    other entries in a shared cache survive.
+    """
+    from common.counts import bump_model_version
+    from products.cache import invalidate_category_listings
+    from products.models import Category
+    from products.search import update_search_vectors
+    from products.services import recompute_ratings
+    update_search_vectors(product_ids)
+    recompute_ratings(product_ids)
+    for model in apps.get_models():
+        bump_model_version(model)
+    invalidate_category_listings(*Category.objects.values_list('pk', flat=True))
+
+
+class MarketplaceGenerator:
+    """Builds the rows of one chunk from the seed and row indexes alone."""
+
+    def __init__(self, seed: int, volumes: Dict[str, int], password_hash: str):
+        self.seed = seed
+        self.volumes = volumes
+        self.password_hash = password_hash
+        self.now = timezone.now()
+
+    def uid(self, kind: str, index: int) -> uuid.UUID:
+        digest = hashlib.md5(f'{self.seed}:{kind}:{index}'.encode()).digest()
+        return uuid.UUID(bytes=digest, version=4)
+
+    def rng(self, kind: str, start: int) -> random.Random:
+        return random.Random(f'{self.seed}:{kind}:{start}')
+
+    def email(self, role: str, index: int) -> str:
+        return f'{role}{index}.s{self.seed}@loadtest.example'
+
+    def timestamp(self, rng: random.Random) -> datetime.datetime:
+        return self.now - datetime.timedelta(seconds=rng.randint(0, HISTORY_DAYS * 86400))
+
+    # ---- Relations computed from indexes ----
+    def association_id(self, index: int) -> uuid.UUID:
+        return self.uid('association', index)
+
+    def artisan_id(self, index: int) -> uuid.UUID:
+        return self.uid('artisan-user', index)
+
+    def product_owner(self, index: int) -> Tuple[str, uuid.UUID]:
+        if index % 10 == 0:
+            return 'association', self.association_id(index // 10 % self.volumes['associations'])
+        return 'artisan', self.artisan_id(index % self.volumes['artisans'])
+
+    def buyer_products(self, buyer: int, count: int, offset: int = 0) -> List[int]:
+        """Distinct product indexes for one buyer, spread across the catalog."""
+        total = self.volumes['products']
+        stride = max(total // max(count, 1), 1)
+        return list(dict.fromkeys((buyer * 7 + offset + k * stride) % total for k in range(min(count, total))))
+
+    # ---- Resume marker ----
+    def marker(self, kind: str, end: int) -> Tuple[type, uuid.UUID]:
+        """Model and primary key of the last row a chunk writes."""
+        from associations.models import Association, Artisan
+        from cart.models import Cart
+        from products.models import Category, Product
+        from users.models import User
+        markers = {
+            'categories': (Category, 'category'),
+            'associations': (Association, 'association'),
+            'artisans': (Artisan, 'artisan-user'),
+            'buyers': (User, 'buyer-user'),
+            'products': (Product, 'product'),
+            'activity': (Cart, 'cart'),
+        }
+        model, uid_kind = markers[kind]
+        return model, self.uid(uid_kind, end - 1)
+
+    def is_done(self, kind: str, end: int) -> bool:
+        model, pk = self.marker(kind, end)
+        return model._default_manager.filter(pk=pk).exists()
+
+    def generate(self, kind: str, start: int, end: int) -> int:
+        """Write one chunk atomically and return the number of rows inserted."""
+        if self.is_done(kind, end):
+            return 0
+        rng = self.rng(kind, start)
+        with transaction.atomic():
+            batches = list(getattr(self, f'build_{kind}')(start, end, rng))
+            for model, objects in batches:
+                insert_rows(model, objects)
+        return sum(len(objects) for _, objects in batches)
+
+    # ---- Builders, each yielding (model, rows) in insertion order ----
+    def users(self, kind: str, role: str, start: int, end: int, rng: random.Random) -> list:
+        from users.models import User
+        rows = []
+        for i in range(start, end):
+            created = self.timestamp(rng)
+            rows.append(User(
+                id=self.uid(kind, i), name=f'{role.replace("_", " ").title()} {i}', email=self.email(role, i),
+                password=self.password_hash, phone=f'+2126{rng.randint(10000000, 99999999)}', role=role,
+                created_at=created, updated_at=created,
+            ))
+        return rows
+
+    def build_categories(self, start: int, end: int, rng: random.Random) -> Iterable:
+        from products.models import Category
+        yield Category, [Category(id=self.uid('category', i), name=f'Category {i} ({self.seed})') for i in range(start, end)]
+
+    def build_associations(self, start: int, end: int, rng: random.Random) -> Iterable:
+        from associations.models import Association
+        from users.models import User
+        admins = self.users('association-admin', 'association_admin', start, end, rng)
+        yield User, admins
+        yield Association, [
+            Association(
+                id=self.association_id(i), name=f'Association {i}', description=f'Cooperative of artisans number {i}',
+                email=admin.email, phone=admin.phone, admin_id=admin.id,
+                created_at=admin.created_at, updated_at=admin.updated_at,
+            )
+            for i, admin in zip(range(start, end), admins)
+        ]
+
+    def build_artisans(self, start: int, end: int, rng: random.Random) -> Iterable:
+        from associations.models import Artisan
+        from users.models import User
+        users = self.users('artisan-user', 'artisan', start, end, rng)
+        associations = self.volumes['associations']
+        yield User, users
+        yield Artisan, [
+            Artisan(
+                user_id=user.id, bio=f'Artisan {i} crafting by hand',
+                association_id=self.association_id(i % associations) if i % 3 else None,
+            )
+            for i, user in zip(range(start, end), users)
+        ]
+
+    def build_buyers(self, start: int, end: int, rng: random.Random) -> Iterable:
+        from users.models import User
+        yield User, self.users('buyer-user', 'buyer', start, end, rng)
+
+    def build_products(self, start: int, end: int, rng: random.Random) -> Iterable:
+        from products.models import Product, ProductImage, ProductTranslation
+        products = []
+        for i in range(start, end):
+            owner_type, owner_id = self.product_owner(i)
+            created = self.timestamp(rng)
+            products.append(Product(
+                id=self.uid('product', i), title=f'Handmade product {i}',
+                description=f'Handmade product {i}, crafted from local materials',
+                price=round(rng.uniform(5, 1000), 2), stock_quantity=rng.randint(0, 500),
+                status=rng.choices(['approved', 'pending', 'rejected'], weights=[80, 15, 5])[0],
+                owner_type=owner_type, owner_id=owner_id,
+                category_id=self.uid('category', rng.randrange(CATEGORY_COUNT)),
+                created_at=created, updated_at=created,
+            ))
+        yield Product, products
+        yield ProductTranslation, [
+            ProductTranslation(product_id=product.id, language_code=language,
+                               title=f'{product.title} [{language}]', description=f'{product.description} [{language}]')
+            for product in products for language in LANGUAGES
+        ]
+        yield ProductImage, [
+            ProductImage(product_id=product.id, image_url=f'https://images.loadtest.example/{product.id}/{n}.jpg')
+            for product in products for n in range(IMAGES_PER_PRODUCT)
+        ]
+
+    def build_activity(self, start: int, end: int, rng: random.Random) -> Iterable:
+        """Carts, favorites, reviews, orders and payments of buyers start..end."""
+        from cart.models import Cart, CartItem
+        from orders.models import Order, OrderItem, Payment
+        from products.favorite_model import Favorite
+        from products.review_model import Review
+
+        carts, cart_items, favorites, reviews, orders, order_items, payments = [], [], [], [], [], [], []
+        for i in range(start, end):
+            buyer_id = self.uid('buyer-user', i)
+            created = self.timestamp(rng)
+            carts.append(Cart(id=self.uid('cart', i), user_id=buyer_id, created_at=created, updated_at=created))
+            for n, product in enumerate(self.buyer_products(i, CART_ITEMS_PER_BUYER)):
+                cart_items.append(CartItem(
+                    id=self.uid('cart-item', i * CART_ITEMS_PER_BUYER + n), cart_id=carts[-1].id,
+                    product_id=self.uid('product', product), quantity=rng.randint(1, 3),
+                    price_at_add=round(rng.uniform(5, 1000), 2), added_at=created,
+                ))
+            for n, product in enumerate(self.buyer_products(i, FAVORITES_PER_BUYER, offset=1)):
+                favorites.append(Favorite(
+                    id=self.uid('favorite', i * FAVORITES_PER_BUYER + n), buyer_id=buyer_id,
+                    product_id=self.uid('product', product), created_at=created, updated_at=created,
+                ))
+            for n, product in enumerate(self.buyer_products(i, REVIEWS_PER_BUYER, offset=2)):
+                reviews.append(Review(
+                    id=self.uid('review', i * REVIEWS_PER_BUYER + n), buyer_id=buyer_id,
+                    product_id=self.uid('product', product), rating=rng.randint(1, 5),
+                    comment=rng.choice(['Beautiful work', 'As described', 'Fast delivery', None]),
+                    created_at=created, updated_at=created,
+                ))
+            for n in range(ORDERS_PER_BUYER):
+                ordered = self.timestamp(rng)
+                status = rng.choice(['pending', 'paid', 'shipped', 'delivered', 'cancelled'])
+                order = Order(
+                    id=self.uid('order', i * ORDERS_PER_BUYER + n), buyer_id=buyer_id, status=status,
+                    shipping_address=f'{rng.randint(1, 300)} Rue des Artisans, Marrakech', total_amount=0,
+                    order_date=ordered, created_at=ordered, updated_at=ordered,
+                )
+                items = [
+                    OrderItem(order_id=order.id, product_id=self.uid('product', product),
+                              quantity=rng.randint(1, 4), unit_price=round(rng.uniform(5, 1000), 2))
+                    for product in self.buyer_products(i, ITEMS_PER_ORDER, offset=3 + n)
+                ]
+                order.total_amount = round(sum(item.quantity * item.unit_price for item in items), 2)
+                orders.append(order)
+                order_items += items
+                if status in ('paid', 'shipped', 'delivered'):
+                    payments.append(Payment(
+                        order_id=order.id, payment_method=rng.choice(['card', 'cash_on_delivery', 'transfer']),
+                        status='completed', payment_date=ordered, transaction_reference=f'TX-{order.id.hex[:16]}',
+                    ))
+
+        yield Cart, carts
+        yield CartItem, cart_items
+        yield Favorite, favorites
+        yield Review, reviews
+        yield Order, orders
+        yield OrderItem, order_items
+        yield Payment, payments
+
+
+def run_unit(arguments: Tuple[dict, str, int, int]) -> Tuple[str, int, int, int]:
+    """Process entry point: generate one chunk and report (kind, start, end, rows)."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    plan, kind, start, end = arguments
+    generator = MarketplaceGenerator(plan['seed'], plan['volumes'], plan['password_hash'])
+    return kind, start, end, generator.generate(kind, start, end)
@@ -0,0 +1,98 @@
+"""Idempotency keys for mutations retried by clients on flaky networks.
+
+The first request with a key inserts the key row and runs the mutation in
+the same transaction, storing the id of what it created. A concurrent
+duplicate blocks on the unique index until that transaction ends, then
+replays the stored result; if the first attempt failed, its key row is
+rolled back with it and the duplicate runs instead.
+"""
+import datetime
+import hashlib
+import json
+from typing import Any, Callable, Optional
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from graphql import GraphQLError
+from common.models import IdempotencyKey
+
+KEY_TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 86400)
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def fingerprint(arguments: dict) -> str:
+    payload = json.dumps(arguments, cls=DjangoJSONEncoder, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cutoff() -> datetime.datetime:
+    return timezone.now() - datetime.timedelta(seconds=KEY_TTL)
+
+
+def _stored_result(record: IdempotencyKey, digest: str, load: Callable[[str], Any]) -> Any:
+    if record.fingerprint != digest:
+        raise GraphQLError('Idempotency key was already used with different arguments')
+    return load(record.result_id)
+
+
+def _claim(scope: str, caller: str, key: str, digest: str) -> bool:
+    """Insert the key row, waiting for a concurrent holder; False when the key is taken."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {IdempotencyKey._meta.db_table} (scope, caller, key, fingerprint, created_at)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (scope, caller, key) DO NOTHING
+            RETURNING id
+            """,
+            [scope, caller, key, digest, timezone.now()],
+        )
+        return cursor.fetchone() is not None
+
+
+def request_caller(info, fallback: Any) -> str:
+    """The authenticated user's id, else fallback (the account the mutation acts for)."""
+    user = getattr(info.context, 'user', None)
+    return f'user:{user.pk}' if user is not None and user.is_authenticated else f'anonymous:{fallback}'
+
+
+def run_idempotent(scope: str, caller: Any, key: Optional[str], arguments: dict,
+                   execute: Callable[[], Any], result_id: Callable[[Any], Any],
+                   load: Callable[[str], Any]) -> Any:
+    """Run execute() once per (scope, caller, key), replaying its stored result afterwards.
+
+    caller identifies who sent the key, e.g. the user id, so two clients
+    choosing the same key do not see each other's results. result_id maps
+    the result to the id stored with the key; load maps the stored id back
+    to the result on replay.
+    """
+    if not key:
+        return execute()
+    if len(key) > MAX_KEY_LENGTH:
+        raise GraphQLError(f'Idempotency key must be at most {MAX_KEY_LENGTH} characters')
+    digest = fingerprint(arguments)
+    caller = str(caller)
+
+    # Replays are a single lookup on the unique (scope, caller, key) index
+    record = IdempotencyKey.objects.filter(scope=scope, caller=caller, key=key, created_at__gte=_cutoff()).first()
+    if record is not None and record.result_id is not None:
+        return _stored_result(record, digest, load)
+
+    with transaction.atomic():
+        if not _claim(scope, caller, key, digest):
+            record = IdempotencyKey.objects.select_for_update().get(scope=scope, caller=caller, key=key)
+            if record.created_at >= _cutoff():
+                return _stored_result(record, digest, load)
+            # Expired key: reuse the row for this request
+            record.fingerprint, record.result_id, record.created_at = digest, None, timezone.now()
+            record.save(update_fields=['fingerprint', 'result_id', 'created_at'])
+        result = execute()
+        IdempotencyKey.objects.filter(scope=scope, caller=caller, key=key).update(result_id=str(result_id(result)))
+    return result
+
+
+def purge_expired_keys() -> int:
+    """Delete expired keys, returning how many were removed."""
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=_cutoff()).delete()
+    return deleted
@@ -0,0 +1,129 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from typing import List, Optional, Tuple
+from django.conf import settings
+from django.db import connections
+from common.metrics import QUERY_COUNT_BUCKETS, registry
+
+logger = logging.getLogger('graphql.instrumentation')
+
+# Fraction of operations instrumented; the rest run without any overhead
+SAMPLE_RATE = getattr(settings, 'GRAPHQL_INSTRUMENTATION_SAMPLE_RATE', 1.0)
+# Resolvers slower than this are logged and recorded individually
+SLOW_RESOLVER_MS = getattr(settings, 'GRAPHQL_SLOW_RESOLVER_MS', 50)
+
+# Operation names used as metric labels; anything else is counted as 'other' so
+# clients cannot create unbounded label series. Persisted operations are added by core.views.
+KNOWN_OPERATIONS = set(getattr(settings, 'GRAPHQL_METRICS_OPERATIONS', ()))
+OTHER_OPERATION = 'other'
+
+operation_duration = registry.histogram(
+    'graphql_operation_duration_seconds', 'Wall time of GraphQL operations.', 'operation')
+operation_db_duration = registry.histogram(
+    'graphql_operation_db_duration_seconds', 'Time spent in SQL per GraphQL operation.', 'operation')
+operation_db_queries = registry.histogram(
+    'graphql_operation_db_queries', 'SQL queries issued per GraphQL operation.', 'operation', QUERY_COUNT_BUCKETS)
+resolver_duration = registry.histogram(
+    'graphql_slow_resolver_duration_seconds', 'Wall time of resolvers above the slow threshold.', 'field')
+
+
+def register_operations(names) -> None:
+    """Allow these operation names as metric labels."""
+    KNOWN_OPERATIONS.update(name for name in names if name)
+
+
+def operation_label(operation_name: Optional[str]) -> str:
+    return operation_name if operation_name in KNOWN_OPERATIONS else OTHER_OPERATION
+
+
+class OperationStats:
+    """Timings and SQL usage collected while executing one GraphQL operation."""
+
+    def __init__(self, operation_name: str):
+        self.operation_name = operation_name
+        self.label = operation_label(operation_name)
+        self.query_count = 0
+        self.db_time = 0.0
+        self.slow_resolvers: List[Tuple[str, str, float]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.query_count += 1
+
+    def add_resolver(self, field: str, path: str, duration: float) -> None:
+        self.slow_resolvers.append((field, path, duration))
+
+
+def get_operation_stats(context) -> Optional[OperationStats]:
+    return getattr(context, 'graphql_stats', None)
+
+
+@contextmanager
+def instrument_operation(request, operation_name: Optional[str]):
+    """Collect timing and SQL statistics for a sampled operation, then report them."""
+    if SAMPLE_RATE <= 0 or random.random() >= SAMPLE_RATE:
+        yield None
+        return
+
+    stats = OperationStats(operation_name or 'anonymous')
+    request.graphql_stats = stats
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            yield stats
+    finally:
+        duration = time.perf_counter() - start
+        request.graphql_stats = None
+        report_operation(stats, duration)
+
+
+def report_operation(stats: OperationStats, duration: float) -> None:
+    """Record an operation in the metrics registry and emit a structured log line."""
+    operation_duration.observe(stats.label, duration)
+    operation_db_duration.observe(stats.label, stats.db_time)
+    operation_db_queries.observe(stats.label, stats.query_count)
+    for field, _path, resolver_time in stats.slow_resolvers:
+        resolver_duration.observe(field, resolver_time)
+
+    record = {
+        'operation': stats.operation_name,
+        'duration_ms': round(duration * 1000, 2),
+        'db_queries': stats.query_count,
+        'db_time_ms': round(stats.db_time * 1000, 2),
+        'slow_resolvers': [
+            {'field': field, 'path': path, 'duration_ms': round(resolver_time * 1000, 2)}
+            for field, path, resolver_time in stats.slow_resolvers
+        ],
+    }
+    logger.info(json.dumps(record), extra={'graphql': record})
+
+
+class InstrumentationMiddleware:
+    """Graphene middleware timing resolvers of sampled operations.
+
+    Only resolvers slower than GRAPHQL_SLOW_RESOLVER_MS are recorded; for
+    unsampled operations it just calls through.
+    """
+
+    def resolve(self, next, root, info, **args):
+        stats = get_operation_stats(info.context)
+        if stats is None:
+            return next(root, info, **args)
+
+        start = time.perf_counter()
+        result = next(root, info, **args)
+        duration = time.perf_counter() - start
+        if duration * 1000 >= SLOW_RESOLVER_MS:
+            path = '.'.join(str(key) for key in info.path.as_list())
+            stats.add_resolver(f'{info.parent_type.name}.{info.field_name}', path, duration)
+        return result
@@ -0,0 +1,273 @@
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import QuerySet
+from graphene.utils.str_converters import to_snake_case
+from graphene_django import DjangoObjectType
+from graphql import get_named_type, is_leaf_type
+
+PEERS_ATTR = '_loader_peers'
+
+
+class BatchLoader:
+    """Request-scoped loader that fetches many keys with a single batch call.
+
+    Results are memoized for the lifetime of the loader, so a key is never
+    fetched twice within one GraphQL operation.
+    """
+
+    def __init__(self, batch_load_fn: Callable[[List[Hashable]], Dict[Hashable, Any]]):
+        self.batch_load_fn = batch_load_fn
+        self._cache: Dict[Hashable, Any] = {}
+
+    def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        """Return values for keys, fetching every uncached key in one batch."""
+        keys = list(keys)
+        missing = list(dict.fromkeys(key for key in keys if key is not None and key not in self._cache))
+        if missing:
+            results = self.batch_load_fn(missing)
+            for key in missing:
+                self._cache[key] = results.get(key)
+        return [self._cache.get(key) for key in keys]
+
+    def load(self, key: Hashable, peer_keys: Iterable[Hashable] = ()) -> Any:
+        """Return the value for key, batching the fetch with any peer keys."""
+        if key is None:
+            return None
+        if key not in self._cache:
+            self.load_many([key, *peer_keys])
+        return self._cache.get(key)
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Seed the cache with an already-known value."""
+        self._cache.setdefault(key, value)
+
+
+class LoaderRegistry:
+    """Holds the loaders for a single GraphQL operation, created on first use."""
+
+    def __init__(self):
+        self._loaders: Dict[Hashable, BatchLoader] = {}
+        self.visited: Dict[tuple, List[Any]] = {}
+        self.resolved: Dict[tuple, Optional[Dict[int, Any]]] = {}
+
+    def get(self, name: Hashable, batch_load_fn: Callable) -> BatchLoader:
+        if name not in self._loaders:
+            self._loaders[name] = BatchLoader(batch_load_fn)
+        return self._loaders[name]
+
+    def for_model(self, model, field_name: str = 'pk') -> BatchLoader:
+        """Loader returning single model instances keyed by field_name."""
+        def batch_load(keys):
+            objects = model._default_manager.filter(**{f'{field_name}__in': keys})
+            return {getattr(obj, field_name): obj for obj in objects}
+        return self.get(('model', model._meta.label, field_name), batch_load)
+
+    def for_related(self, model, fk_field) -> BatchLoader:
+        """Loader returning lists of model instances grouped by a foreign key value."""
+        def batch_load(keys):
+            groups = {key: [] for key in keys}
+            for obj in model._default_manager.filter(**{f'{fk_field.name}__in': keys}):
+                groups[getattr(obj, fk_field.attname)].append(obj)
+            return groups
+        return self.get(('related', model._meta.label, fk_field.name), batch_load)
+
+
+def get_loaders(info) -> LoaderRegistry:
+    """Return the loader registry attached to the GraphQL context.
+
+    The context is the Django request, so the registry lives exactly as long
+    as the operation being executed.
+    """
+    context = info.context
+    registry = getattr(context, 'loaders', None)
+    if registry is None:
+        registry = LoaderRegistry()
+        setattr(context, 'loaders', registry)
+    return registry
+
+
+def _unique(objects: Iterable[Any]) -> List[Any]:
+    return list({id(obj): obj for obj in objects if obj is not None}.values())
+
+
+def remember_peers(objects: List[Any]) -> List[Any]:
+    """Mark objects as loaded together so their relations can be batched."""
+    for obj in objects:
+        setattr(obj, PEERS_ATTR, objects)
+    return objects
+
+
+def get_peers(obj: Any) -> List[Any]:
+    """Return the objects loaded alongside obj, or just obj itself."""
+    peers: Optional[List[Any]] = getattr(obj, PEERS_ATTR, None)
+    return peers if peers is not None else [obj]
+
+
+def _materialize(result: Any) -> Any:
+    return list(result) if isinstance(result, QuerySet) else result
+
+
+def _is_model_list(result: Any) -> bool:
+    return isinstance(result, list) and bool(result) and isinstance(result[0], models.Model)
+
+
+def _is_relation_result(result: Any) -> bool:
+    """True for what a relation resolver returns, including an empty list or None."""
+    if isinstance(result, list):
+        return all(isinstance(item, models.Model) for item in result)
+    return result is None or isinstance(result, models.Model)
+
+
+def _uses_default_queryset(graphene_type) -> bool:
+    return graphene_type.get_queryset.__func__ is DjangoObjectType.get_queryset.__func__
+
+
+class LoaderMiddleware:
+    """Graphene middleware resolving Django relation fields through batch loaders.
+
+    Lists of model instances returned by any resolver are recorded as peers.
+    Foreign-key and reverse foreign-key fields without a custom resolver are
+    then loaded for all peers at once, so nested selections cost a fixed
+    number of queries regardless of list sizes.
+    """
+
+    def __init__(self):
+        self._relations: Dict[tuple, Optional[models.Field]] = {}
+
+    def resolve(self, next, root, info, **args):
+        if isinstance(root, models.Model):
+            relation = self._get_relation(info)
+            if relation is not None:
+                if relation.one_to_many:
+                    return self._resolve_reverse(relation, root, info)
+                return self._resolve_forward(relation, root, info)
+
+        if isinstance(root, models.Model) and not is_leaf_type(get_named_type(info.return_type)):
+            return self._resolve_for_peers(next, root, info, args)
+
+        result = _materialize(next(root, info, **args))
+        if _is_model_list(result):
+            remember_peers(result)
+        return result
+
+    def _resolve_for_peers(self, next, root, info, args):
+        """Run an object resolver for every peer of root on first use.
+
+        Execution is depth-first, so without this each parent's list would
+        form its own peer group and nested relations would be loaded once per
+        parent. Resolving the whole group up front lets everything returned
+        at this level be batched together.
+        """
+        peers = get_peers(root)
+        if len(peers) == 1:
+            result = _materialize(next(root, info, **args))
+            if _is_model_list(result):
+                remember_peers(result)
+            return result
+
+        registry = get_loaders(info)
+        marker = (id(peers), info.parent_type.name, info.field_name, repr(sorted(args.items())))
+        if marker not in registry.resolved:
+            result = _materialize(next(root, info, **args))
+            if not _is_relation_result(result):
+                registry.resolved[marker] = None  # Not a relation: resolve per object
+                return result
+            results = {id(root): result}
+            for peer in peers:
+                if peer is not root:
+                    try:
+                        results[id(peer)] = _materialize(next(peer, info, **args))
+                    except Exception as error:  # Raised again when that peer is resolved
+                        results[id(peer)] = error
+            registry.resolved[marker] = results
+            registry.visited[marker] = peers  # Keeps the group alive so its id is never reused
+            remember_peers(_unique(
+                child for value in results.values()
+                for child in (value if isinstance(value, list) else [value])
+                if isinstance(child, models.Model)
+            ))
+
+        results = registry.resolved[marker]
+        if results is None or id(root) not in results:
+            return _materialize(next(root, info, **args))
+        result = results.pop(id(root))
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _get_relation(self, info) -> Optional[models.Field]:
+        cache_key = (info.parent_type.name, info.field_name)
+        if cache_key not in self._relations:
+            self._relations[cache_key] = self._find_relation(info)
+        return self._relations[cache_key]
+
+    def _find_relation(self, info) -> Optional[models.Field]:
+        graphene_type = getattr(info.parent_type, 'graphene_type', None)
+        if not (isinstance(graphene_type, type) and issubclass(graphene_type, DjangoObjectType)):
+            return None
+        name = to_snake_case(info.field_name)
+        if hasattr(graphene_type, f'resolve_{name}'):
+            return None  # Custom resolvers keep full control
+        try:
+            field = graphene_type._meta.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+        related_type = graphene_type._meta.registry.get_type_for_model(field.related_model) if field.is_relation else None
+        if related_type is None or not _uses_default_queryset(related_type):
+            return None
+        if field.concrete and (field.many_to_one or field.one_to_one):
+            return field
+        if field.one_to_many:
+            return field
+        return None
+
+    def _resolve_forward(self, field, root, info):
+        peers = get_peers(root)
+        if not self._first_visit(info, peers, field):
+            return field.get_cached_value(root) if field.is_cached(root) else None
+
+        missing = [peer for peer in peers if not field.is_cached(peer)]
+        if missing:
+            loader = get_loaders(info).for_model(field.related_model, field.target_field.attname)
+            values = loader.load_many(getattr(peer, field.attname) for peer in missing)
+            for peer, value in zip(missing, values):
+                field.set_cached_value(peer, value)
+
+        remember_peers(_unique(field.get_cached_value(peer) for peer in peers))
+        return field.get_cached_value(root)
+
+    def _resolve_reverse(self, rel, root, info):
+        accessor = rel.get_accessor_name()
+        peers = get_peers(root)
+        first_visit = self._first_visit(info, peers, rel)
+
+        if accessor in getattr(root, '_prefetched_objects_cache', {}):
+            if first_visit:
+                remember_peers([
+                    child for peer in peers
+                    if accessor in getattr(peer, '_prefetched_objects_cache', {})
+                    for child in getattr(peer, accessor).all()
+                ])
+            return list(getattr(root, accessor).all())
+
+        fk_field = rel.field
+        key_attname = fk_field.target_field.attname
+        loader = get_loaders(info).for_related(rel.related_model, fk_field)
+        if first_visit:
+            groups = loader.load_many(getattr(peer, key_attname) for peer in peers)
+            remember_peers([child for group in groups for child in group])
+        return loader.load(getattr(root, key_attname)) or []
+
+    @staticmethod
+    def _first_visit(info, peers, relation) -> bool:
+        """Return True the first time a relation is resolved for a group of peers."""
+        if len(peers) == 1:
+            return True
+        visited = get_loaders(info).visited
+        marker = (id(peers), relation)
+        if marker in visited:
+            return False
+        visited[marker] = peers  # Keeps the group alive so its id is never reused
+        return True
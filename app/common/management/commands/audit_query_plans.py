@@ -0,0 +1,62 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from common.benchmark import graphql_request
+from common.plan_audit import audit_operation, fixtures, operations
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Run a representative query for every GraphQL root query field, EXPLAIN ANALYZE each SELECT, '
+            'and flag sequential scans and sorts on large tables with index suggestions.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rows', type=int, default=10000, help='Table size from which scans and sorts are flagged')
+        parser.add_argument('--fields', nargs='+', help='Only audit these root fields')
+        parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plan audit requires PostgreSQL')
+        from core.schema import schema
+
+        data = fixtures()
+        users = {role: User.objects.filter(role=role).first() for role in ('buyer', 'platform_admin')}
+        users['buyer'] = users['buyer'] or User.objects.first()
+        reports = []
+        for operation in operations(schema, data):
+            if options['fields'] and operation['name'].split('(')[0] not in options['fields']:
+                continue
+            if operation['query'] is None:
+                reports.append({'name': operation['name'], 'skipped': 'no rows to build required arguments from'})
+                continue
+            user = users[operation['role']]
+            if user is None:
+                reports.append({'name': operation['name'], 'skipped': f"no {operation['role']} user to run it as"})
+                continue
+            reports.append(audit_operation(schema, operation, graphql_request(user), options['min_rows']))
+
+        if options['json']:
+            self.stdout.write(json.dumps(reports, indent=2, default=str))
+            return
+
+        suggestions = {}
+        for report in reports:
+            if 'skipped' in report:
+                self.stdout.write(self.style.WARNING(f"{report['name']}: skipped, {report['skipped']}"))
+                continue
+            total_ms = sum(statement['execution_ms'] or 0 for statement in report['statements'])
+            findings = [finding for statement in report['statements'] for finding in statement['findings']]
+            style = self.style.ERROR if findings else self.style.SUCCESS
+            self.stdout.write(style(f"{report['name']}: {len(report['statements'])} statements, {total_ms:.1f}ms"))
+            for error in report['errors']:
+                self.stdout.write(f'  error: {error}')
+            for finding in findings:
+                self.stdout.write(f"  {finding['issue']}")
+                if finding['suggestion']:
+                    suggestions.setdefault(finding['suggestion'], []).append(report['name'])
+
+        if suggestions:
+            self.stdout.write('\nSuggested indexes:')
+            for statement, fields in suggestions.items():
+                self.stdout.write(f"  {statement};  -- {', '.join(sorted(set(fields)))}")
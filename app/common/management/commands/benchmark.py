@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from common.benchmark import (
+    SCENARIOS, bench_users, clear_dataset, compare, fixtures, load_baseline, run_scenario, save_baseline, seed_dataset,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the main GraphQL operations against a seeded dataset and compare with a baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000, help='Dataset size; other volumes scale with it')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the dataset')
+        parser.add_argument('--reseed', action='store_true', help='Drop and recreate the benchmark dataset')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed runs per operation')
+        parser.add_argument('--operations', nargs='+', choices=sorted(SCENARIOS), help='Subset of operations to run')
+        parser.add_argument('--cold', action='store_true', help='Bypass the cache on every run')
+        parser.add_argument('--baseline', default='benchmark_baseline.json', help='Baseline file to compare against')
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 slowdown before failing')
+
+    def handle(self, *args, **options):
+        if options['reseed']:
+            clear_dataset()
+        if not bench_users().exists():
+            self.stdout.write(f"Seeding benchmark dataset with {options['products']} products...")
+            counts = seed_dataset(options['products'], options['seed'])
+            self.stdout.write(', '.join(f'{count} {name}' for name, count in counts.items()))
+
+        data = fixtures()
+        results = {}
+        self.stdout.write(f"{'operation':<14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'queries':>9}")
+        for name in options['operations'] or SCENARIOS:
+            result = results[name] = run_scenario(name, SCENARIOS[name](data), options['iterations'], cold=options['cold'])
+            self.stdout.write(f"{name:<14}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+                              f"{result['max_ms']:>10}{result['queries']:>9}")
+
+        if options['save_baseline']:
+            save_baseline(options['baseline'], results, {'products': options['products'], 'cold': options['cold']})
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}"))
+            return
+
+        try:
+            baseline = load_baseline(options['baseline'])
+        except FileNotFoundError:
+            self.stdout.write(f"No baseline at {options['baseline']}, run with --save-baseline to create one")
+            return
+        if (baseline.get('products'), baseline.get('cold')) != (options['products'], options['cold']):
+            self.stdout.write(self.style.WARNING('Baseline was recorded with different --products/--cold settings'))
+        regressions = compare(results, baseline['results'], options['tolerance'])
+        if regressions:
+            raise CommandError('Regressions against baseline:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
@@ -0,0 +1,46 @@
+import os
+import time
+from multiprocessing import Pool
+from django.core.management.base import BaseCommand
+from django.db import connections
+from common.datagen import plan_units, plan_volumes, refresh_derived_data, run_unit
+from users.utils import hash_password
+
+
+class Command(BaseCommand):
+    help = ('Generate a synthetic marketplace for load testing with COPY, in parallel chunks. '
+            'Re-running with the same --products and --seed resumes where an interrupted run stopped.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000, help='Number of products; other volumes scale with it')
+        parser.add_argument('--seed', type=int, default=1, help='Dataset seed; keep it to resume or extend a run')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per chunk, each written in one transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel processes')
+        parser.add_argument('--password', default='loadtest-password', help='Password of every generated user')
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Do not rebuild search vectors and rating aggregates afterwards')
+
+    def handle(self, *args, **options):
+        volumes = plan_volumes(options['products'])
+        plan = {'seed': options['seed'], 'volumes': volumes, 'password_hash': hash_password(options['password'])}
+        self.stdout.write(', '.join(f'{count} {kind}' for kind, count in volumes.items()))
+
+        started = time.monotonic()
+        for units in plan_units(volumes, options['chunk_size']):
+            work = [(plan, kind, start, end) for kind, start, end in units]
+            if options['workers'] > 1:
+                connections.close_all()  # Workers must not share the parent's connection
+                with Pool(options['workers']) as pool:
+                    self.report(pool.imap_unordered(run_unit, work))
+            else:
+                self.report(map(run_unit, work))
+
+        if not options['skip_derived']:
+            self.stdout.write('Rebuilding search vectors and rating aggregates...')
+            refresh_derived_data()
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.monotonic() - started:.1f}s'))
+
+    def report(self, results):
+        for kind, start, end, rows in results:
+            status = f'{rows} rows' if rows else 'already present, skipped'
+            self.stdout.write(f'{kind} {start}-{end}: {status}')
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from common.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete mutation idempotency keys older than IDEMPOTENCY_KEY_TTL. Run periodically, e.g. hourly from cron.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Deleted {purge_expired_keys()} expired idempotency keys')
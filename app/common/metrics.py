@@ -0,0 +1,73 @@
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+# Upper bounds in seconds for latency histograms
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds for per-operation SQL query counts
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus style, kept per label value."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._series.setdefault(label_value, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            totals[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: (list(counts), totals[0]) for key, (counts, totals) in self._series.items()}
+        for label_value, (counts, total) in sorted(series.items()):
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {total}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """Process-local collection of histograms exposed on the metrics endpoint.
+
+    Every worker process keeps its own registry, so each one is scraped
+    separately.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, label: str, buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, help_text, label, buckets)
+            return self._histograms[name]
+
+    def render(self) -> str:
+        """Return all histograms in the Prometheus text exposition format."""
+        lines = []
+        for histogram in list(self._histograms.values()):
+            lines.extend(histogram.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
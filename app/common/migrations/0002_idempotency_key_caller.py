@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='idempotencykey',
+            name='idempotency_scope_key_uniq',
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='caller',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('scope', 'caller', 'key'), name='idempotency_scope_caller_key_uniq'),
+        ),
+    ]
@@ -12,3 +12,19 @@ class TimeStampedModel(models.Model):
 
     class Meta:
         abstract = True
+
+class IdempotencyKey(models.Model):
+    """Result of a mutation executed under a client-supplied idempotency key.
+
+    Rows expire after IDEMPOTENCY_KEY_TTL and are removed by the
+    purge_idempotency_keys command.
+    """
+    scope = models.CharField(max_length=50)  # Mutation the key belongs to
+    caller = models.CharField(max_length=64)  # Who sent the key; keys from different callers never collide
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # Hash of the mutation arguments
+    result_id = models.CharField(max_length=64, null=True)
+    created_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['scope', 'caller', 'key'], name='idempotency_scope_caller_key_uniq')]
@@ -1,43 +1,211 @@
+import base64
+import datetime
+import json
+import math
 import graphene
-from django.core.paginator import Paginator
-from django.db.models import QuerySet
-from typing import Tuple, Any
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from graphql import GraphQLError
+from typing import Tuple, Any, List, Optional
+from common.counts import cached_count
+from common.loaders import remember_peers
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = getattr(settings, 'GRAPHQL_MAX_PAGE_SIZE', 100)
 
 class PaginationInput(graphene.InputObjectType):
-    """GraphQL input type for pagination parameters."""
+    """GraphQL input type for pagination parameters.
+
+    Use page/page_size for numbered pages, or first/after for cursor
+    (keyset) pagination, which stays fast at any depth.
+    """
     page = graphene.Int()
     page_size = graphene.Int()
+    first = graphene.Int()
+    after = graphene.String()
 
 class PageInfo(graphene.ObjectType):
-    """GraphQL type for pagination metadata."""
+    """GraphQL type for pagination metadata.
+
+    total_count and total_pages are only computed when selected, through the
+    shared count cache.
+    """
     has_next_page = graphene.Boolean()
     has_previous_page = graphene.Boolean()
     current_page = graphene.Int()
     total_pages = graphene.Int()
     total_count = graphene.Int()
+    end_cursor = graphene.String()
+
+    count_queryset = None
+    page_size = None
+
+    def resolve_total_count(self, info):
+        if self.total_count is None and self.count_queryset is not None:
+            self.total_count = cached_count(self.count_queryset)
+        return self.total_count
+
+    def resolve_total_pages(self, info):
+        if self.total_pages is None and self.count_queryset is not None:
+            total_count = self.resolve_total_count(info)
+            self.total_pages = max(1, math.ceil(total_count / self.page_size))
+        return self.total_pages
+
+def lazy_page_info(queryset: QuerySet, page_size: int, **kwargs) -> PageInfo:
+    """Build a PageInfo whose counts are resolved on demand from queryset."""
+    page_info = PageInfo(**kwargs)
+    page_info.count_queryset = queryset
+    page_info.page_size = page_size
+    return page_info
+
+def _input_value(pagination_input: Optional[PaginationInput], name: str) -> Any:
+    """Read a pagination argument, ignoring unset graphene field placeholders."""
+    value = getattr(pagination_input, name, None)
+    return value if isinstance(value, (int, str)) else None
+
+def page_size_value(value: Optional[int], name: str) -> int:
+    """Validate a requested page size, defaulting when unset and clamping to MAX_PAGE_SIZE."""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    if value < 1:
+        raise GraphQLError(f'{name} must be at least 1')
+    return min(value, MAX_PAGE_SIZE)
 
 def paginate_queryset(queryset: QuerySet, pagination_input: PaginationInput) -> Tuple[Any, PageInfo]:
     """Paginate Django queryset and return results with page info.
-    
+
     Args:
         queryset: Django QuerySet to paginate
-        pagination_input: PaginationInput with page and page_size
-        
+        pagination_input: PaginationInput with page and page_size, or first and after
+
     Returns:
         Tuple of (paginated_objects, page_info)
     """
-    page = pagination_input.page or 1
-    page_size = pagination_input.page_size or 10
-    
-    paginator = Paginator(queryset, page_size)
-    current_page = paginator.get_page(page)
-    
-    page_info = PageInfo(
-        has_next_page=current_page.has_next(),
-        has_previous_page=current_page.has_previous(),
-        current_page=current_page.number,
-        total_pages=paginator.num_pages,
-        total_count=paginator.count
+    first = _input_value(pagination_input, 'first')
+    after = _input_value(pagination_input, 'after')
+    if first is not None or after is not None:
+        if first is None:
+            first = page_size_value(_input_value(pagination_input, 'page_size'), 'pageSize')
+        return paginate_by_cursor(queryset, first, after)
+
+    page = max(_input_value(pagination_input, 'page') or 1, 1)
+    page_size = page_size_value(_input_value(pagination_input, 'page_size'), 'pageSize')
+
+    # Fetch one extra row to learn whether a next page exists without COUNT(*)
+    objects = list(queryset[(page - 1) * page_size:page * page_size + 1])
+    if not objects and page > 1:
+        # Past the end: clamp to the last page like Paginator.get_page
+        page = max(1, math.ceil(cached_count(queryset) / page_size))
+        objects = list(queryset[(page - 1) * page_size:page * page_size + 1])
+
+    page_info = lazy_page_info(
+        queryset,
+        page_size,
+        has_next_page=len(objects) > page_size,
+        has_previous_page=page > 1,
+        current_page=page
+    )
+
+    # Materialize the page so related fields can be batch-loaded across it
+    objects = remember_peers(objects[:page_size])
+    return objects, page_info
+
+# ---------------- Keyset (cursor) pagination ----------------
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder keeping full datetime precision so cursors compare exactly."""
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+def _sort_keys(queryset: QuerySet) -> List[Tuple[str, bool]]:
+    """Return the queryset ordering as (field, descending) pairs ending with the primary key."""
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    keys = []
+    for item in ordering:
+        if not isinstance(item, str) or item == '?':
+            raise GraphQLError('Cursor pagination requires ordering by plain fields')
+        name = item.lstrip('-')
+        keys.append(('pk' if name in ('pk', 'id') else name, item.startswith('-')))
+    if not any(name == 'pk' for name, _ in keys):
+        keys.append(('pk', keys[-1][1] if keys else False))
+    return keys
+
+def _resolve_field(queryset: QuerySet, path: str):
+    """Return the field an ordering path points to, including annotations."""
+    model = queryset.model
+    if path == 'pk':
+        return model._meta.pk
+    if path in queryset.query.annotations:
+        return queryset.query.annotations[path].output_field
+    *relations, name = path.split(LOOKUP_SEP)
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+def _key_value(obj: Any, path: str) -> Any:
+    for attr in path.split(LOOKUP_SEP):
+        obj = getattr(obj, attr) if obj is not None else None
+    return obj
+
+def encode_cursor(obj: Any, keys: List[Tuple[str, bool]]) -> str:
+    """Encode the sort key values of obj as an opaque cursor."""
+    values = [_key_value(obj, name) for name, _ in keys]
+    payload = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str, queryset: QuerySet, keys: List[Tuple[str, bool]]) -> List[Any]:
+    """Decode a cursor back into typed sort key values."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(keys):
+            raise ValueError('Cursor does not match ordering')
+        return [_resolve_field(queryset, name).to_python(value) for (name, _), value in zip(keys, values)]
+    except (ValueError, TypeError, ValidationError):
+        raise GraphQLError('Invalid cursor')
+
+def _after_filter(keys: List[Tuple[str, bool]], values: List[Any]) -> Q:
+    """Build the keyset condition selecting rows strictly after the cursor position.
+
+    The redundant bound on the leading key lets the planner start the index
+    scan at the cursor instead of filtering every earlier row.
+    """
+    condition = Q()
+    for index, (name, descending) in enumerate(keys):
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[index]})
+        for previous_index in range(index):
+            step &= Q(**{keys[previous_index][0]: values[previous_index]})
+        condition |= step
+    (name, descending), value = keys[0], values[0]
+    if value is not None:
+        condition &= Q(**{f"{name}__{'lte' if descending else 'gte'}": value})
+    return condition
+
+def paginate_by_cursor(queryset: QuerySet, first: Optional[int], after: Optional[str] = None) -> Tuple[Any, PageInfo]:
+    """Paginate with a keyset cursor instead of OFFSET.
+
+    Each page is a single indexed range scan on the sort key plus primary key,
+    so latency does not grow with depth.
+    """
+    first = page_size_value(first, 'first')
+    keys = _sort_keys(queryset)
+    count_queryset = queryset
+    queryset = queryset.order_by(*[f"{'-' if descending else ''}{name}" for name, descending in keys])
+    if after:
+        queryset = queryset.filter(_after_filter(keys, decode_cursor(after, queryset, keys)))
+
+    objects = list(queryset[:first + 1])
+    has_next_page = len(objects) > first
+    objects = objects[:first]
+
+    page_info = lazy_page_info(
+        count_queryset,
+        first,
+        has_next_page=has_next_page,
+        has_previous_page=bool(after),
+        end_cursor=encode_cursor(objects[-1], keys) if objects else after
     )
-    
-    return current_page.object_list, page_info
\ No newline at end of file
+    return remember_peers(objects), page_info
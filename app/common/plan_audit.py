@@ -0,0 +1,234 @@
+"""Query plan audit for the GraphQL root fields, used by the audit_query_plans command.
+
+Each root query field is executed with a generated representative selection,
+every SELECT it issues is re-run under EXPLAIN (ANALYZE, BUFFERS), and plan
+nodes that scan or sort large tables are reported with an index suggestion.
+"""
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+from django.apps import apps
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from common.benchmark import graphene_middleware
+from common.cache import uncached
+from graphene_django import DjangoObjectType
+from graphql import (
+    GraphQLList, GraphQLNonNull, GraphQLObjectType, get_named_type, get_nullable_type, is_leaf_type,
+)
+
+MAX_SELECTION_DEPTH = 3
+
+# Extra operations for arguments that change the SQL of a root field
+VARIANTS = {
+    'allProducts': [
+        {'sortBy': '"newest"'},
+        {'sortBy': '"price_asc"', 'filters': '{status: "approved"}'},
+        {'categoryId': '$categoryId', 'filters': '{status: "approved", priceMax: 100}'},
+        {'filters': '{ownerType: "artisan", minRating: 3}', 'sortBy': '"top_rated"'},
+    ],
+    'storefrontProducts': [
+        {'sortBy': '"price_asc"'},
+        {'sortBy': '"top_rated"'},
+        {'categoryId': '$categoryId'},
+    ],
+}
+
+# Root fields that refuse anyone but platform admins, audited as one
+ADMIN_FIELDS = ('moderationQueue',)
+
+STRING_LITERAL = re.compile(r"\(?(\w+)\)?(?:::\w+)? = '([^']*)'")
+IDENTIFIER = re.compile(r'\b([a-z_][a-z0-9_]*)\b')
+SORT_KEY = re.compile(r'^(\w+\.)?(\w+)( DESC)?$')
+
+
+# ---------------- Representative operations ----------------
+def _model_for(graphql_type) -> Optional[type]:
+    graphene_type = getattr(get_named_type(graphql_type), 'graphene_type', None)
+    if isinstance(graphene_type, type) and issubclass(graphene_type, DjangoObjectType):
+        return graphene_type._meta.model
+    return None
+
+
+def _find_model(graphql_type, depth: int = 0) -> Optional[type]:
+    """Model returned by a field, looking through paginated wrapper types."""
+    model = _model_for(graphql_type)
+    named = get_named_type(graphql_type)
+    if model is None and isinstance(named, GraphQLObjectType) and depth < 1:
+        for field in named.fields.values():
+            if isinstance(get_nullable_type(field.type), GraphQLList):
+                return _find_model(field.type, depth + 1)
+    return model
+
+
+def selection(graphql_type, depth: int = 0) -> str:
+    """Select every leaf field, and nested objects up to MAX_SELECTION_DEPTH."""
+    named = get_named_type(graphql_type)
+    parts = []
+    for name, field in named.fields.items():
+        if any(isinstance(arg.type, GraphQLNonNull) for arg in field.args.values()):
+            continue
+        if is_leaf_type(get_named_type(field.type)):
+            parts.append(name)
+        elif depth + 1 < MAX_SELECTION_DEPTH:
+            parts.append(f'{name} {selection(field.type, depth + 1)}')
+    return '{ ' + ' '.join(parts) + ' }'
+
+
+def argument_value(name: str, field, fixtures: Dict[str, Any]) -> Optional[str]:
+    """Literal for a required argument, taken from existing rows."""
+    arg_type = get_named_type(field.args[name].type).name
+    if arg_type == 'String':
+        return '"handmade"'
+    if name in ('id', 'userId'):
+        model = _find_model(field.type)
+        value = fixtures.get(model._meta.label) if model else None
+    else:
+        value = fixtures.get(name)
+    return f'"{value}"' if value is not None else None
+
+
+def fixtures() -> Dict[str, Any]:
+    """Primary keys of rows the generated operations point at."""
+    values = {}
+    for model in apps.get_models():
+        pk = model._default_manager.order_by().values_list('pk', flat=True).first()
+        if pk is not None:
+            values[model._meta.label] = pk
+    product = apps.get_model('products', 'Review').objects.order_by().values_list('product_id', flat=True).first()
+    values['productId'] = product or values.get('products.Product')
+    values['buyerId'] = apps.get_model('users', 'User').objects.filter(role='buyer').values_list('pk', flat=True).first()
+    values['categoryId'] = values.get('products.Category')
+    return values
+
+
+def operations(schema, data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield {'name', 'role', 'query'} for every root query field and its variants."""
+    for name, field in schema.graphql_schema.query_type.fields.items():
+        required = [arg for arg, definition in field.args.items() if isinstance(definition.type, GraphQLNonNull)]
+        arguments = {arg: argument_value(arg, field, data) for arg in required}
+        role = 'platform_admin' if name in ADMIN_FIELDS else 'buyer'
+        if any(value is None for value in arguments.values()):
+            yield {'name': name, 'role': role, 'query': None}
+            continue
+        body = selection(field.type) if not is_leaf_type(get_named_type(field.type)) else ''
+        for variant in [{}] + VARIANTS.get(name, []):
+            variant = {arg: value.replace('$categoryId', f'"{data.get("categoryId")}"') for arg, value in variant.items()}
+            args = ', '.join(f'{arg}: {value}' for arg, value in {**arguments, **variant}.items())
+            label = name + (f'({args})' if variant else '')
+            yield {'name': label, 'role': role, 'query': f'{{ {name}{f"({args})" if args else ""} {body} }}'}
+
+
+# ---------------- Plans ----------------
+def explain(sql: str) -> dict:
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}')
+        plan = cursor.fetchone()[0]
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]
+
+
+def walk(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get('Plans', ()):
+        yield from walk(child)
+
+
+_table_rows: Dict[str, int] = {}
+
+
+def table_rows(table: str) -> int:
+    """Planner row estimate for a table."""
+    if table not in _table_rows:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE relname = %s', [table])
+            row = cursor.fetchone()
+        _table_rows[table] = row[0] if row else 0
+    return _table_rows[table]
+
+
+def table_columns(table: str) -> List[str]:
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return [field.column for field in model._meta.concrete_fields]
+    return []
+
+
+def suggest_index(table: str, filter_text: str = '', sort_keys: List[str] = ()) -> Optional[str]:
+    """Composite index on filtered columns then sort keys; partial when filtering on a literal."""
+    columns = table_columns(table)
+    text_search = [column for column in IDENTIFIER.findall(filter_text.split('@@')[0]) if column in columns]
+    if '@@' in filter_text and text_search:
+        return f'CREATE INDEX CONCURRENTLY ON {table} USING gin ({text_search[-1]})'
+
+    literals = {column: value for column, value in STRING_LITERAL.findall(filter_text) if column in columns}
+    filtered = [column for column in dict.fromkeys(IDENTIFIER.findall(filter_text))
+                if column in columns and column not in literals]
+    sorted_ = [match.group(2) + (match.group(3) or '') for match in map(SORT_KEY.match, sort_keys)
+               if match and match.group(2) in columns]
+    index_columns = list(dict.fromkeys([*filtered, *sorted_])) or list(literals)
+    if not index_columns:
+        return None
+    statement = f'CREATE INDEX CONCURRENTLY ON {table} ({", ".join(index_columns)})'
+    if literals and filtered + sorted_:
+        statement += ' WHERE ' + ' AND '.join(f"{column} = '{value}'" for column, value in literals.items())
+    return statement
+
+
+def rows_read(node: dict) -> int:
+    """Rows a plan node actually produced or discarded, over all loops."""
+    return int((node.get('Actual Rows', 0) + node.get('Rows Removed by Filter', 0)) * node.get('Actual Loops', 1))
+
+
+def _scanned_relation(node: dict) -> Optional[dict]:
+    for child in walk(node):
+        if 'Relation Name' in child:
+            return child
+    return None
+
+
+def audit_plan(plan: dict, min_rows: int) -> List[Dict[str, Optional[str]]]:
+    """Flag sequential scans reading, and sorts ordering, at least min_rows rows.
+
+    Scans cut short by a LIMIT are not flagged.
+    """
+    findings = []
+    for node in walk(plan['Plan']):
+        node_type = node['Node Type']
+        if node_type == 'Seq Scan' and rows_read(node) >= min_rows:
+            table = node['Relation Name']
+            findings.append({
+                'issue': f"Seq Scan on {table} read {rows_read(node)} rows" + (f" filter {node['Filter']}" if 'Filter' in node else ''),
+                'suggestion': suggest_index(table, node.get('Filter', '')),
+            })
+        elif node_type in ('Sort', 'Incremental Sort') and node.get('Plans') and rows_read(node['Plans'][0]) >= min_rows:
+            scan = _scanned_relation(node)
+            table = scan['Relation Name'] if scan else '?'
+            findings.append({
+                'issue': f"{node_type} of {rows_read(node['Plans'][0])} rows from {table} by {', '.join(node.get('Sort Key', []))}",
+                'suggestion': scan and suggest_index(table, scan.get('Filter', '') + scan.get('Index Cond', ''), node.get('Sort Key', [])),
+            })
+    return findings
+
+
+def audit_operation(schema, operation: Dict[str, Any], context, min_rows: int) -> Dict[str, Any]:
+    """Run one operation, then EXPLAIN ANALYZE each SELECT it issued."""
+    report = {'name': operation['name'], 'statements': [], 'errors': []}
+    with transaction.atomic():
+        # Cached listings would hide the SQL
+        with uncached(), CaptureQueriesContext(connection) as queries:
+            result = schema.execute(operation['query'], context_value=context, middleware=graphene_middleware())
+        report['errors'] = [str(error) for error in result.errors or ()]
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            plan = explain(sql)
+            report['statements'].append({
+                'sql': sql,
+                'execution_ms': plan.get('Execution Time'),
+                'shared_hit': plan['Plan'].get('Shared Hit Blocks'),
+                'shared_read': plan['Plan'].get('Shared Read Blocks'),
+                'findings': audit_plan(plan, min_rows),
+            })
+        transaction.set_rollback(True)
+    return report
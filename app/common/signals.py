@@ -0,0 +1,15 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+from common.counts import COUNTED_MODELS, bump_model_version
+
+
+def invalidate_counts(sender, **kwargs):
+    """Invalidate cached row counts of a model whenever one of its rows changes."""
+    bump_model_version(sender)
+
+
+# Only counted models get receivers: a delete receiver disables Django's
+# fast delete for its model, including in cascades
+for label in COUNTED_MODELS:
+    post_save.connect(invalidate_counts, sender=apps.get_model(label), dispatch_uid=f'invalidate_counts:{label}')
+    post_delete.connect(invalidate_counts, sender=apps.get_model(label), dispatch_uid=f'invalidate_counts:{label}')
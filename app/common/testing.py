@@ -0,0 +1,35 @@
+"""Fixtures and helpers shared by the apps' test suites."""
+import itertools
+from django.test import override_settings
+from associations.models import Artisan
+from common.benchmark import graphene_middleware, graphql_request
+from products.models import Category, Product
+from users.models import User
+
+_sequence = itertools.count()
+
+# Each test class gets a private in-process cache, so listing caches never leak between tests
+isolated_cache = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                                       'LOCATION': 'tests'}})
+
+
+def make_user(role: str = 'buyer', **fields) -> User:
+    number = next(_sequence)
+    return User.objects.create(name=f'{role} {number}', email=f'{role}{number}@tests.example', role=role,
+                               password='!', **fields)
+
+
+def make_product(owner: Artisan = None, category: Category = None, **fields) -> Product:
+    if owner is None:
+        owner = Artisan.objects.create(user=make_user('artisan'), bio='')
+    defaults = {'title': f'Product {next(_sequence)}', 'description': '', 'price': 10.0, 'stock_quantity': 10,
+                'status': 'approved'}
+    return Product.objects.create(owner_type='artisan', owner_id=owner.user_id, category=category,
+                                  **{**defaults, **fields})
+
+
+def execute(query: str, user: User = None, variables: dict = None):
+    """Execute a GraphQL operation through the configured middleware, as user when given."""
+    from core.schema import schema
+    return schema.execute(query, variables=variables, context_value=graphql_request(user),
+                          middleware=graphene_middleware())
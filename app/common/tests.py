@@ -1,3 +1,178 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from common.benchmark import graphql_request
+from common.cache import get_cached, set_cached, uncached
+from common.counts import cached_count
+from common.plan_audit import audit_operation, fixtures, operations
+from common.testing import execute, isolated_cache, make_product, make_user
+from core.schema import schema
+from orders.models import Order, OrderItem
+from products.models import Category, Product, ProductImage
 
-# Create your tests here.
+NESTED_ORDERS_QUERY = '''
+    query($size: Int) {
+        allOrders(pagination: {pageSize: $size}) {
+            orders { items { product { title owner category { name } images { imageUrl } } } }
+        }
+    }
+'''
+
+
+@isolated_cache
+class LoaderMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        buyer = make_user()
+        category = Category.objects.create(name='Rugs')
+        # An order without items comes first, so the first peer's relation is empty
+        Order.objects.create(buyer=buyer, total_amount=0, shipping_address='')
+        for _ in range(6):
+            order = Order.objects.create(buyer=buyer, total_amount=0, shipping_address='')
+            for _ in range(2):
+                product = make_product(category=category)
+                ProductImage.objects.create(product=product, image_url='https://img.example/1.jpg')
+                OrderItem.objects.create(order=order, product=product, quantity=1, unit_price=product.price)
+
+    def query_count(self, size):
+        with CaptureQueriesContext(connection) as queries:
+            result = execute(NESTED_ORDERS_QUERY, variables={'size': size})
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(result.data['allOrders']['orders']), size)
+        return len(queries.captured_queries)
+
+    def test_nested_lists_cost_a_constant_number_of_queries(self):
+        self.assertEqual(self.query_count(3), self.query_count(7))
+
+    def test_empty_relation_on_the_first_parent_keeps_batching(self):
+        result = execute('{ allOrders(pagination: {pageSize: 1}) { orders { items { id } } } }')
+        self.assertEqual(result.data['allOrders']['orders'], [{'items': []}])
+        self.assertEqual(self.query_count(3), self.query_count(7))
+
+
+@isolated_cache
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        products = [make_product(price=float(index % 3)) for index in range(13)]
+        # Ties on the sort key must be broken by the primary key
+        Product.objects.filter(pk__in=[product.pk for product in products[:6]]).update(created_at=products[0].created_at)
+        cls.product_ids = {str(product.pk) for product in products}
+
+    def walk(self, sort_by):
+        query = '''
+            query($after: String, $sortBy: String) {
+                allProducts(pagination: {first: 4, after: $after}, sortBy: $sortBy) {
+                    products { id }
+                    pageInfo { hasNextPage endCursor }
+                }
+            }
+        '''
+        seen, after = [], None
+        while True:
+            result = execute(query, variables={'after': after, 'sortBy': sort_by})
+            self.assertIsNone(result.errors)
+            page = result.data['allProducts']
+            seen += [product['id'] for product in page['products']]
+            if not page['pageInfo']['hasNextPage']:
+                return seen
+            after = page['pageInfo']['endCursor']
+
+    def test_pages_return_every_row_exactly_once(self):
+        for sort_by in ('newest', 'oldest', 'price_asc', 'price_desc'):
+            with self.subTest(sort_by=sort_by):
+                seen = self.walk(sort_by)
+                self.assertEqual(len(seen), len(self.product_ids))
+                self.assertEqual(set(seen), self.product_ids)
+
+    def test_invalid_cursor_is_rejected(self):
+        result = execute('{ allProducts(pagination: {first: 2, after: "garbage"}) { products { id } } }')
+        self.assertEqual(result.errors[0].message, 'Invalid cursor')
+
+
+@isolated_cache
+class PageSizeTests(TestCase):
+    PRODUCTS_QUERY = 'query($p: PaginationInput) { allProducts(pagination: $p) { products { id } pageInfo { hasNextPage } } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        for _ in range(5):
+            make_product()
+
+    def page(self, pagination):
+        return execute(self.PRODUCTS_QUERY, variables={'p': pagination})
+
+    def test_sizes_below_one_are_rejected(self):
+        for pagination, message in (({'pageSize': -5}, 'pageSize must be at least 1'),
+                                    ({'pageSize': 0}, 'pageSize must be at least 1'),
+                                    ({'first': -1}, 'first must be at least 1'),
+                                    ({'after': None, 'first': 0}, 'first must be at least 1')):
+            with self.subTest(pagination=pagination):
+                result = self.page(pagination)
+                self.assertEqual(result.errors[0].message, message)
+
+    def test_moderation_queue_rejects_negative_first(self):
+        result = execute('{ moderationQueue(first: -1) { products { id } } }', user=make_user('platform_admin'))
+        self.assertEqual(result.errors[0].message, 'first must be at least 1')
+
+    def test_large_sizes_are_clamped(self):
+        with mock.patch('common.pagination.MAX_PAGE_SIZE', 3):
+            for pagination in ({'pageSize': 100000}, {'first': 100000}):
+                with self.subTest(pagination=pagination):
+                    page = self.page(pagination).data['allProducts']
+                    self.assertEqual(len(page['products']), 3)
+                    self.assertTrue(page['pageInfo']['hasNextPage'])
+
+
+@isolated_cache
+class CountCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()  # Counts cached by earlier tests outlive their rolled back rows
+
+    def test_counts_follow_writes_to_counted_models(self):
+        product = make_product()
+        self.assertEqual(cached_count(Product.objects.all()), 1)
+        make_product()
+        self.assertEqual(cached_count(Product.objects.all()), 2)
+        product.delete()
+        self.assertEqual(cached_count(Product.objects.all()), 1)
+
+    def test_evicted_version_counter_never_serves_an_older_count(self):
+        self.assertEqual(cached_count(Product.objects.all()), 0)
+        cache.delete('version:model:products.product')
+        make_product()
+        self.assertEqual(cached_count(Product.objects.all()), 1)
+
+    def test_uncounted_models_keep_fast_deletes(self):
+        product = make_product()
+        for index in range(3):
+            ProductImage.objects.create(product=product, image_url=f'https://img.example/{index}.jpg')
+        with CaptureQueriesContext(connection) as queries:
+            ProductImage.objects.filter(product=product).delete()
+        self.assertEqual(len(queries.captured_queries), 1)
+
+
+@isolated_cache
+class PlanAuditTests(TestCase):
+    def test_admin_fields_are_audited_as_admin_and_the_cache_is_kept(self):
+        make_product(status='pending')
+        admin = make_user('platform_admin')
+        operation = next(operation for operation in operations(schema, fixtures())
+                         if operation['name'] == 'moderationQueue')
+        self.assertEqual(operation['role'], 'platform_admin')
+        cache.set('unrelated', 'kept')
+
+        report = audit_operation(schema, operation, graphql_request(admin), min_rows=10000)
+        self.assertEqual(report['errors'], [])
+        self.assertTrue(any('"status" = \'pending\'' in statement['sql'] for statement in report['statements']))
+        self.assertEqual(cache.get('unrelated'), 'kept')
+
+    def test_uncached_skips_reads_and_writes_without_touching_entries(self):
+        set_cached('listing', 'cached page', 60)
+        with uncached():
+            self.assertIsNone(get_cached('listing'))
+            set_cached('written while uncached', 'page', 60)
+        self.assertEqual(get_cached('listing'), 'cached page')
+        self.assertIsNone(get_cached('written while uncached'))
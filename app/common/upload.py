@@ -0,0 +1,53 @@
+import json
+from typing import Any, Dict
+import graphene
+from django.http import HttpResponseBadRequest
+from graphene_django.views import HttpError
+
+
+class Upload(graphene.Scalar):
+    """File sent with the GraphQL multipart request spec; resolves to a Django UploadedFile."""
+
+    @staticmethod
+    def serialize(value):
+        return None
+
+    @staticmethod
+    def parse_literal(node, _variables=None):
+        return None
+
+    @staticmethod
+    def parse_value(value):
+        return value
+
+
+def parse_multipart_operations(request) -> Dict[str, Any]:
+    """Build the GraphQL request body of a multipart upload.
+
+    Files from request.FILES are placed at the variable paths listed in the
+    'map' field, e.g. {"0": ["variables.file"]}.
+    """
+    try:
+        operations = json.loads(request.POST['operations'])
+        file_map = json.loads(request.POST.get('map') or '{}')
+    except ValueError:
+        raise HttpError(HttpResponseBadRequest('Multipart operations or map are invalid JSON.'))
+    if not isinstance(operations, dict):
+        raise HttpError(HttpResponseBadRequest('Batched multipart operations are not supported.'))
+
+    for key, paths in file_map.items():
+        if key not in request.FILES:
+            raise HttpError(HttpResponseBadRequest(f'File {key} is missing from the request.'))
+        for path in paths:
+            *parents, name = path.split('.')
+            target = operations
+            try:
+                for part in parents:
+                    target = target[int(part)] if isinstance(target, list) else target[part]
+                if isinstance(target, list):
+                    target[int(name)] = request.FILES[key]
+                else:
+                    target[name] = request.FILES[key]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise HttpError(HttpResponseBadRequest(f'Invalid file path {path}.'))
+    return operations
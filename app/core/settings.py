@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     # Custom applications
+    'common',         # Shared models, pagination and caching helpers
     'users',          # User management and authentication
     'associations',   # Artisan associations
     'products',       # Product catalog
@@ -92,6 +93,24 @@ DATABASES = {
 }
 
 
+# Cache configuration
+# Shared Redis cache in production, per-process memory cache otherwise
+REDIS_URL = env('REDIS_URL', default=None)
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -139,9 +158,50 @@ GRAPHENE = {
     'SCHEMA': 'core.schema.schema',  # Main GraphQL schema
     'MIDDLEWARE': [
         'graphql_jwt.middleware.JSONWebTokenMiddleware',  # JWT authentication
+        'common.loaders.LoaderMiddleware',  # Batched relation loading
+        'common.instrumentation.InstrumentationMiddleware',  # Resolver timings (outermost)
     ],
 }
 
+# Parsed/validated document LRU size and persisted query registry (JSON list of queries)
+GRAPHQL_DOCUMENT_CACHE_SIZE = 500
+GRAPHQL_PERSISTED_QUERIES_FILE = env('GRAPHQL_PERSISTED_QUERIES_FILE', default=str(BASE_DIR / 'persisted_queries.json'))
+
+# Largest page any paginated field returns; larger requests are clamped
+GRAPHQL_MAX_PAGE_SIZE = env.int('GRAPHQL_MAX_PAGE_SIZE', default=100)
+
+# Static query cost budget, see core/validation.py
+GRAPHQL_MAX_QUERY_COST = env.int('GRAPHQL_MAX_QUERY_COST', default=10000)
+GRAPHQL_MAX_QUERY_DEPTH = env.int('GRAPHQL_MAX_QUERY_DEPTH', default=10)
+GRAPHQL_FIELD_COSTS = {
+    'Query.searchProducts': 10,
+    'PaginatedProducts.facets': 20,
+}
+
+# Operation instrumentation: sampled fraction, slow resolver threshold, metrics endpoint token
+GRAPHQL_INSTRUMENTATION_SAMPLE_RATE = env.float('GRAPHQL_INSTRUMENTATION_SAMPLE_RATE', default=0.1)
+GRAPHQL_SLOW_RESOLVER_MS = env.int('GRAPHQL_SLOW_RESOLVER_MS', default=50)
+METRICS_TOKEN = env('METRICS_TOKEN', default=None)  # Metrics are only served when set
+# Operation names recorded as metric labels besides persisted ones; others are labelled 'other'
+GRAPHQL_METRICS_OPERATIONS = env.list('GRAPHQL_METRICS_OPERATIONS', default=[])
+
+# Bearer token required by the catalog export feed when set
+CATALOG_EXPORT_TOKEN = env('CATALOG_EXPORT_TOKEN', default=None)
+
+# Lifetime of mutation idempotency keys, see common/idempotency.py
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=86400)  # seconds
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'graphql.instrumentation': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
@@ -0,0 +1,104 @@
+import json
+from unittest import mock
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from graphql import parse, validate
+from common.instrumentation import OTHER_OPERATION, operation_label, register_operations
+from common.testing import isolated_cache
+from core.schema import schema
+from core.validation import query_cost_rule
+from core.views import CachedGraphQLView, LRUCache, metrics_view, operation_names, query_hash
+
+ORDERS_QUERY = 'query($p: PaginationInput) { allOrders(pagination: $p) { orders { buyer { id } } } }'
+
+
+class QueryCostRuleTests(SimpleTestCase):
+    def cost_errors(self, query, variables=None):
+        return validate(schema.graphql_schema, parse(query), [query_cost_rule(variables)])
+
+    def test_small_page_is_accepted(self):
+        self.assertEqual(self.cost_errors(ORDERS_QUERY, {'p': {'pageSize': 10}}), [])
+
+    def test_large_page_literal_is_rejected(self):
+        errors = self.cost_errors('{ allOrders(pagination: {pageSize: 100000}) { orders { buyer { id } } } }')
+        self.assertIn('exceeds the maximum', errors[0].message)
+
+    def test_large_page_in_pagination_variable_is_rejected(self):
+        errors = self.cost_errors(ORDERS_QUERY, {'p': {'pageSize': 100000}})
+        self.assertIn('exceeds the maximum', errors[0].message)
+
+    def test_large_first_in_nested_variable_is_rejected(self):
+        query = 'query($n: Int) { allOrders(pagination: {first: $n}) { orders { buyer { id } } } }'
+        self.assertTrue(self.cost_errors(query, {'n': 100000}))
+
+    def test_first_argument_outside_pagination_is_counted(self):
+        errors = self.cost_errors('{ moderationQueue(first: 100000) { products { category { id } } } }')
+        self.assertIn('exceeds the maximum', errors[0].message)
+
+    def test_introspection_is_free(self):
+        self.assertEqual(self.cost_errors('{ __schema { types { name fields { name } } } }'), [])
+
+
+class MetricsTests(SimpleTestCase):
+    def scrape(self, **headers):
+        return metrics_view(RequestFactory().get('/metrics/', headers=headers))
+
+    def test_metrics_are_disabled_without_a_token(self):
+        with mock.patch('core.views.METRICS_TOKEN', None):
+            self.assertEqual(self.scrape().status_code, 403)
+
+    def test_metrics_require_the_configured_token(self):
+        with mock.patch('core.views.METRICS_TOKEN', 'secret'):
+            self.assertEqual(self.scrape(Authorization='Bearer wrong').status_code, 403)
+            self.assertEqual(self.scrape(Authorization='Bearer secret').status_code, 200)
+
+    def test_unknown_operation_names_share_one_label(self):
+        register_operations(operation_names(['query StorefrontPage { storefrontProducts { products { id } } }']))
+        self.assertEqual(operation_label('StorefrontPage'), 'StorefrontPage')
+        self.assertEqual(operation_label('Random123'), OTHER_OPERATION)
+        self.assertEqual(operation_label(None), OTHER_OPERATION)
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        documents = LRUCache(2)
+        documents.set('a', 1)
+        documents.set('b', 2)
+        documents.get('a')
+        documents.set('c', 3)
+        self.assertEqual((documents.get('a'), documents.get('b'), documents.get('c')), (1, None, 3))
+
+
+@isolated_cache
+class CachedGraphQLViewTests(TestCase):
+    QUERY = 'query Categories { allCategories { id } }'
+
+    def setUp(self):
+        patcher = mock.patch.object(CachedGraphQLView, 'documents', LRUCache(10))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, **body):
+        return self.client.post('/graphql/', json.dumps(body), content_type='application/json')
+
+    def test_documents_are_parsed_and_validated_once(self):
+        with mock.patch('core.views.parse', wraps=parse) as parse_spy, \
+                mock.patch('core.views.validate', wraps=validate) as validate_spy:
+            for _ in range(3):
+                self.assertEqual(self.post(query=self.QUERY).json(), {'data': {'allCategories': []}})
+            for _ in range(2):
+                self.assertIn('errors', self.post(query='{ noSuchField }').json())
+        self.assertEqual(parse_spy.call_count, 2)
+        # One full validation per document, plus the per-request cost check
+        self.assertEqual(validate_spy.call_count, 2 + 3)
+
+    def test_persisted_query_is_served_by_hash(self):
+        persisted = {'persistedQuery': {'sha256Hash': query_hash(self.QUERY)}}
+        with mock.patch.object(CachedGraphQLView, 'persisted_queries', {query_hash(self.QUERY): self.QUERY}):
+            hit = self.post(extensions=persisted)
+            miss = self.post(extensions={'persistedQuery': {'sha256Hash': query_hash('{ other }')}})
+            mismatch = self.post(query='{ allCategories { name } }', extensions=persisted)
+        self.assertEqual(hit.json(), {'data': {'allCategories': []}})
+        self.assertEqual(miss.status_code, 400)
+        self.assertIn('PersistedQueryNotFound', miss.content.decode())
+        self.assertEqual(mismatch.status_code, 400)
+        self.assertIn('does not match', mismatch.content.decode())
@@ -1,7 +1,9 @@
-# type: ignore
 from django.urls import path
-from graphene_django.views import GraphQLView
+from core.views import CachedGraphQLView, metrics_view
+from products.views import catalog_export
 
 urlpatterns = [
-     path('graphql/', GraphQLView.as_view(graphiql=True)),
+     path('graphql/', CachedGraphQLView.as_view(graphiql=True)),
+     path('metrics/', metrics_view),
+     path('catalog/export/', catalog_export),
 ]
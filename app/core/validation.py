@@ -0,0 +1,133 @@
+from typing import Any, Dict, Optional, Tuple, Type
+from django.conf import settings
+from graphql import (
+    FieldNode, FragmentSpreadNode, GraphQLError, GraphQLObjectType, OperationDefinitionNode, SelectionSetNode, ValidationRule,
+    VariableNode, coerce_input_value, get_named_type, get_nullable_type, is_list_type, is_leaf_type, value_from_ast,
+)
+from graphql.language import Visitor
+from common.pagination import DEFAULT_PAGE_SIZE
+
+MAX_QUERY_COST = getattr(settings, 'GRAPHQL_MAX_QUERY_COST', 10000)
+MAX_QUERY_DEPTH = getattr(settings, 'GRAPHQL_MAX_QUERY_DEPTH', 10)
+# Estimated length of lists that take no pagination argument (translations, items, ...)
+DEFAULT_LIST_SIZE = getattr(settings, 'GRAPHQL_DEFAULT_LIST_SIZE', 10)
+# Arguments setting the length of a list field, directly or inside a 'pagination' input
+PAGE_SIZE_ARGUMENTS = ('first', 'page_size')
+# Extra weight of expensive fields, keyed by 'TypeName.fieldName'
+FIELD_COSTS: Dict[str, int] = getattr(settings, 'GRAPHQL_FIELD_COSTS', {})
+
+
+class QueryCostRule(ValidationRule):
+    """Reject operations whose static cost or depth exceeds the configured budget.
+
+    Object fields cost 1 (or their FIELD_COSTS weight), leaf fields cost
+    nothing, and the cost of a list is multiplied by its expected length:
+    the page size requested through a pagination argument, or
+    DEFAULT_LIST_SIZE for unpaginated lists. Introspection is not counted.
+    """
+
+    variables: Dict[str, Any] = {}
+    max_cost = MAX_QUERY_COST
+    max_depth = MAX_QUERY_DEPTH
+
+    def enter_operation_definition(self, node: OperationDefinitionNode, *_args):
+        root_type = self.context.schema.get_root_type(node.operation)
+        if root_type is None:
+            return Visitor.SKIP
+        cost, depth = self.selection_cost(node.selection_set, root_type, None, 0)
+        if depth > self.max_depth:
+            self.report_error(GraphQLError(f'Query depth {depth} exceeds the maximum of {self.max_depth}', node))
+        elif cost > self.max_cost:
+            self.report_error(GraphQLError(f'Query cost {cost} exceeds the maximum of {self.max_cost}', node))
+        return Visitor.SKIP
+
+    def selection_cost(self, selection_set: Optional[SelectionSetNode], parent_type, list_size: Optional[int],
+                       depth: int) -> Tuple[int, int]:
+        """Return (cost, depth) of a selection set under parent_type."""
+        if selection_set is None:
+            return 0, depth
+        total_cost, max_depth = 0, depth
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                cost, field_depth = self.field_cost(selection, parent_type, list_size, depth + 1)
+            else:
+                if isinstance(selection, FragmentSpreadNode):
+                    fragment = self.context.get_fragment(selection.name.value)
+                    if fragment is None:
+                        continue
+                else:
+                    fragment = selection
+                fragment_type = parent_type
+                if fragment.type_condition is not None:
+                    fragment_type = self.context.schema.get_type(fragment.type_condition.name.value) or parent_type
+                cost, field_depth = self.selection_cost(fragment.selection_set, fragment_type, list_size, depth)
+            total_cost += cost
+            max_depth = max(max_depth, field_depth)
+        return total_cost, max_depth
+
+    def field_cost(self, node: FieldNode, parent_type, list_size: Optional[int], depth: int) -> Tuple[int, int]:
+        name = node.name.value
+        if name.startswith('__') or not isinstance(parent_type, GraphQLObjectType):
+            return 0, depth - 1
+        field = parent_type.fields.get(name)
+        if field is None:
+            return 0, depth
+
+        field_type = get_nullable_type(field.type)
+        named_type = get_named_type(field_type)
+        page_size = self.page_size(node, field)
+
+        if is_leaf_type(named_type):
+            return FIELD_COSTS.get(f'{parent_type.name}.{name}', 0), depth
+
+        own_cost = FIELD_COSTS.get(f'{parent_type.name}.{name}', 1)
+        if is_list_type(field_type):
+            # A paginated parent sets the length of the list directly below it
+            multiplier = page_size or list_size or DEFAULT_LIST_SIZE
+            child_cost, child_depth = self.selection_cost(node.selection_set, named_type, None, depth)
+            return multiplier * (own_cost + child_cost), child_depth
+
+        child_cost, child_depth = self.selection_cost(node.selection_set, named_type, page_size, depth)
+        return own_cost + child_cost, child_depth
+
+    def argument_values(self, node: FieldNode, field) -> Dict[str, Any]:
+        """Coerce a field's arguments, keyed by their Python names.
+
+        Input objects passed as a whole variable are coerced too, so their
+        keys are out names ('page_size') like those of literal objects.
+        Invalid arguments are skipped; execution reports them.
+        """
+        values = {}
+        for argument_node in node.arguments or ():
+            argument = field.args.get(argument_node.name.value)
+            if argument is None:
+                continue
+            try:
+                if isinstance(argument_node.value, VariableNode):
+                    value = coerce_input_value(self.variables.get(argument_node.value.name.value), argument.type)
+                else:
+                    value = value_from_ast(argument_node.value, argument.type, self.variables)
+            except (GraphQLError, TypeError, ValueError):
+                continue
+            values[argument.out_name or argument_node.name.value] = value
+        return values
+
+    def page_size(self, node: FieldNode, field) -> Optional[int]:
+        """Return the page size requested through a field's pagination or first/pageSize arguments."""
+        names = {argument.out_name or name for name, argument in field.args.items()}
+        if 'pagination' not in names and not names.intersection(PAGE_SIZE_ARGUMENTS):
+            return None
+        values = self.argument_values(node, field)
+        if 'pagination' in names:
+            values = values.get('pagination')
+        if not isinstance(values, dict):
+            return DEFAULT_PAGE_SIZE
+        for key in PAGE_SIZE_ARGUMENTS:
+            size = values.get(key)
+            if isinstance(size, int) and not isinstance(size, bool) and size > 0:
+                return size
+        return DEFAULT_PAGE_SIZE
+
+def query_cost_rule(variables: Optional[Dict[str, Any]]) -> Type[QueryCostRule]:
+    """Bind request variables to QueryCostRule so page sizes passed as variables count."""
+    return type('BoundQueryCostRule', (QueryCostRule,), {'variables': variables or {}})
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotAllowed
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, parse, print_schema, validate, validate_schema
+from graphql.language import FieldNode, OperationDefinitionNode
+from common.instrumentation import instrument_operation, register_operations
+from common.metrics import registry
+from common.upload import parse_multipart_operations
+from core.validation import query_cost_rule
+
+DOCUMENT_CACHE_SIZE = getattr(settings, 'GRAPHQL_DOCUMENT_CACHE_SIZE', 500)
+INTROSPECTION_CACHE_SIZE = getattr(settings, 'GRAPHQL_INTROSPECTION_CACHE_SIZE', 20)
+PERSISTED_QUERIES_FILE = getattr(settings, 'GRAPHQL_PERSISTED_QUERIES_FILE', None)
+METRICS_TOKEN = getattr(settings, 'METRICS_TOKEN', None)
+
+
+class LRUCache:
+    """Small thread-safe least-recently-used cache held in process memory."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def load_persisted_queries(path: Optional[str]) -> Dict[str, str]:
+    """Load the persisted query registry, a JSON list of queries or a {sha256: query} map."""
+    if not path or not Path(path).exists():
+        return {}
+    with open(path, encoding='utf-8') as registry_file:
+        entries = json.load(registry_file)
+    queries = entries.values() if isinstance(entries, dict) else entries
+    return {query_hash(query): query for query in queries}
+
+
+def operation_names(queries) -> set:
+    """Names of the operations defined in query documents."""
+    names = set()
+    for query in queries:
+        try:
+            document = parse(query)
+        except Exception:
+            continue
+        names.update(definition.name.value for definition in document.definitions
+                     if isinstance(definition, OperationDefinitionNode) and definition.name is not None)
+    return names
+
+
+def is_introspection(operation: Optional[OperationDefinitionNode]) -> bool:
+    """Return True for queries selecting only introspection root fields."""
+    if operation is None or operation.operation != OperationType.QUERY:
+        return False
+    return all(
+        isinstance(selection, FieldNode) and selection.name.value.startswith('__')
+        for selection in operation.selection_set.selections
+    )
+
+
+class CachedGraphQLView(GraphQLView):
+    """GraphQLView that skips parsing and validation for known documents.
+
+    Parsed and validated documents are kept in an LRU keyed by query hash,
+    clients may send the hash of a persisted query instead of its text, and
+    introspection results are cached per schema version.
+    """
+
+    # Shared across requests: Django instantiates the view once per request
+    documents = LRUCache(DOCUMENT_CACHE_SIZE)
+    introspection_results = LRUCache(INTROSPECTION_CACHE_SIZE)
+    persisted_queries = load_persisted_queries(PERSISTED_QUERIES_FILE)
+    register_operations(operation_names(persisted_queries.values()))
+    schema_versions: Dict[int, str] = {}
+
+    def parse_body(self, request):
+        if request.content_type == 'multipart/form-data' and 'operations' in request.POST:
+            return parse_multipart_operations(request)
+        return super().parse_body(request)
+
+    def get_graphql_params(self, request, data):
+        query, variables, operation_name, id = super().get_graphql_params(request, data)
+
+        persisted_hash = self.get_persisted_query_hash(request, data)
+        if persisted_hash:
+            if query and query_hash(query) != persisted_hash:
+                raise HttpError(HttpResponseBadRequest('Persisted query hash does not match the query.'))
+            if not query:
+                query = self.persisted_queries.get(persisted_hash)
+                if query is None:
+                    raise HttpError(HttpResponseBadRequest('PersistedQueryNotFound'))
+
+        return query, variables, operation_name, id
+
+    @staticmethod
+    def get_persisted_query_hash(request, data) -> Optional[str]:
+        """Read the sha256 hash of a persisted query from the request extensions."""
+        extensions = request.GET.get('extensions') or data.get('extensions')
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest('Extensions are invalid JSON.'))
+        if not isinstance(extensions, dict):
+            return None
+        return (extensions.get('persistedQuery') or {}).get('sha256Hash')
+
+    def get_schema_version(self) -> str:
+        schema = self.schema.graphql_schema
+        if id(schema) not in self.schema_versions:
+            self.schema_versions[id(schema)] = query_hash(print_schema(schema))
+        return self.schema_versions[id(schema)]
+
+    def get_document(self, query: str):
+        """Return (document, errors) for a query, parsing and validating it once."""
+        key = (id(self.schema.graphql_schema), query_hash(query))
+        cached = self.documents.get(key)
+        if cached is None:
+            try:
+                document = parse(query)
+            except Exception as e:
+                return None, [e]
+            errors = validate(
+                self.schema.graphql_schema,
+                document,
+                self.validation_rules,
+                graphene_settings.MAX_VALIDATION_ERRORS,
+            )
+            cached = (document, errors)
+            self.documents.set(key, cached)
+        return cached
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        document, errors = self.get_document(query)
+        if document is None:
+            return ExecutionResult(errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        # Cost depends on page sizes passed as variables, so it is checked per request
+        cost_errors = validate(schema, document, [query_cost_rule(variables)])
+        if cost_errors:
+            return ExecutionResult(data=None, errors=cost_errors)
+
+        if is_introspection(operation_ast):
+            key = (self.get_schema_version(), query_hash(query), operation_name, json.dumps(variables, sort_keys=True))
+            result = self.introspection_results.get(key)
+            if result is None:
+                result = self.execute_document(request, document, variables, operation_name, operation_ast)
+                if not result.errors:
+                    self.introspection_results.set(key, result)
+            return result
+
+        if operation_name is None and operation_ast is not None and operation_ast.name is not None:
+            operation_name = operation_ast.name.value
+        with instrument_operation(request, operation_name):
+            return self.execute_document(request, document, variables, operation_name, operation_ast)
+
+    def execute_document(self, request, document, variables, operation_name, operation_ast):
+        """Execute an already validated document, as GraphQLView does."""
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options[
+                    "execution_context_class"
+                ] = self.execution_context_class
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(self.schema.graphql_schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(self.schema.graphql_schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+
+def metrics_view(request):
+    """Expose GraphQL operation histograms in the Prometheus text format.
+
+    Scrapers must send METRICS_TOKEN as a bearer token; without a configured
+    token the endpoint is disabled.
+    """
+    if not METRICS_TOKEN or request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -16,6 +16,15 @@ class Order(TimeStampedModel):
     shipping_address = models.TextField()
     tracking_number = models.CharField(max_length=100, null=True, blank=True)
 
+    # Allowed status changes; delivered and cancelled are final
+    STATUS_TRANSITIONS = {
+        'pending': ('paid', 'cancelled'),
+        'paid': ('shipped', 'cancelled'),
+        'shipped': ('delivered',),
+        'delivered': (),
+        'cancelled': (),
+    }
+
 class OrderItem(models.Model):
     """Individual items within an order."""
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
@@ -23,6 +32,23 @@ class OrderItem(models.Model):
     quantity = models.IntegerField()
     unit_price = models.FloatField()
 
+class OrderStatusHistory(models.Model):
+    """Append-only log of order status changes."""
+    order = models.ForeignKey(Order, related_name='status_history', on_delete=models.CASCADE)
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    tracking_number = models.CharField(max_length=100, null=True, blank=True)
+    changed_by = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['order', 'changed_at'], name='order_status_history_idx')]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Order status history is append-only')
+        super().save(*args, **kwargs)
+
 class Payment(models.Model):
     """Payment tracking for orders."""
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
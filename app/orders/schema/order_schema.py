@@ -1,10 +1,16 @@
 import graphene
+from django.db.models import Prefetch, QuerySet
 from graphene_django import DjangoObjectType
-from orders.models import Order, OrderItem
+from orders.models import Order, OrderItem, OrderStatusHistory
 from users.models import User
-from products.models import Product
 from graphql import GraphQLError
 from common.pagination import PaginationInput, PageInfo, paginate_queryset
+from orders.services import MAX_STATUS_BATCH, checkout_cart, merge_lines, place_order, update_order_statuses
+from graphql_jwt.decorators import login_required
+from common.idempotency import request_caller, run_idempotent
+
+# Sellers and platform admins may move an order through its statuses
+STATUS_UPDATE_ROLES = ('platform_admin', 'association_admin', 'artisan')
 
 # -------- Types --------
 class OrderItemType(DjangoObjectType):
@@ -12,21 +18,37 @@ class OrderItemType(DjangoObjectType):
         model = OrderItem
         fields = ("id", "product", "quantity", "unit_price")
 
+class OrderStatusHistoryType(DjangoObjectType):
+    class Meta:
+        model = OrderStatusHistory
+        fields = ("id", "from_status", "to_status", "tracking_number", "changed_by", "changed_at")
+
 class OrderType(DjangoObjectType):
     items = graphene.List(OrderItemType)
+    status_history = graphene.List(OrderStatusHistoryType)
 
     class Meta:
         model = Order
         fields = ("id", "buyer", "total_amount", "status", "order_date", "shipping_address", "tracking_number", "created_at", "updated_at")
 
     def resolve_items(self, info):
-        return OrderItem.objects.filter(order=self)
+        # Served from the prefetch cache when the order was loaded with with_items()
+        return self.items.all()
+
+    def resolve_status_history(self, info):
+        # Served from the prefetch cache, oldest first, when loaded with with_items()
+        return self.status_history.all()
 
 # -------- Input Object Type --------
 class OrderItemInput(graphene.InputObjectType):
     product_id = graphene.UUID(required=True)
     quantity = graphene.Int(required=True)
-    unit_price = graphene.Float(required=True)
+    unit_price = graphene.Float(deprecation_reason="Ignored: items are priced from the catalog")
+
+class OrderStatusUpdateInput(graphene.InputObjectType):
+    id = graphene.UUID(required=True)
+    status = graphene.String(required=True)
+    tracking_number = graphene.String()
 
 # -------- Paginated Orders Type --------
 class PaginatedOrders(graphene.ObjectType):
@@ -34,6 +56,13 @@ class PaginatedOrders(graphene.ObjectType):
     page_info = graphene.Field(PageInfo)
 
 # -------- Queries --------
+def with_items(queryset: QuerySet) -> QuerySet:
+    """Prefetch order items with their products and categories, and the status history, in two queries."""
+    return queryset.prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('product__category').defer('product__search_vector')),
+        Prefetch('status_history', queryset=OrderStatusHistory.objects.select_related('changed_by').order_by('changed_at')),
+    )
+
 class OrderQuery(graphene.ObjectType):
     all_orders = graphene.Field(PaginatedOrders, pagination=PaginationInput())
     order = graphene.Field(OrderType, id=graphene.UUID(required=True))
@@ -41,13 +70,13 @@ class OrderQuery(graphene.ObjectType):
     def resolve_all_orders(self, info, pagination=None):
         if pagination is None:
             pagination = PaginationInput()
-        queryset = Order.objects.select_related('buyer').all()
+        queryset = with_items(Order.objects.select_related('buyer'))
         orders, page_info = paginate_queryset(queryset, pagination)
         return PaginatedOrders(orders=orders, page_info=page_info)
 
     def resolve_order(self, info, id):
         try:
-            return Order.objects.get(id=id)
+            return with_items(Order.objects.select_related('buyer')).get(id=id)
         except Order.DoesNotExist:
             raise GraphQLError('Order not found')
 
@@ -59,30 +88,38 @@ class CreateOrder(graphene.Mutation):
         buyer_id = graphene.UUID(required=True)
         shipping_address = graphene.String(required=True)
         items = graphene.List(OrderItemInput, required=True)
+        idempotency_key = graphene.String(description="Retries with the same key return the first order")
 
-    def mutate(self, info, buyer_id, shipping_address, items):
-        try:
-            buyer = User.objects.get(id=buyer_id, role='buyer')
-        except User.DoesNotExist:
-            raise GraphQLError('Buyer not found')
-
-        order = Order(buyer=buyer, shipping_address=shipping_address, total_amount=0, status='pending')
-        order.save()
+    def mutate(self, info, buyer_id, shipping_address, items, idempotency_key=None):
+        quantities = merge_lines((item_data.product_id, item_data.quantity) for item_data in items)
 
-        total_amount = 0
-        for item_data in items:
+        def create():
             try:
-                product = Product.objects.get(id=item_data.product_id)
-            except Product.DoesNotExist:
-                raise GraphQLError(f'Product {item_data.product_id} not found')
+                buyer = User.objects.get(id=buyer_id, role='buyer')
+            except User.DoesNotExist:
+                raise GraphQLError('Buyer not found')
+            return place_order(buyer, shipping_address, quantities)
+
+        order = run_idempotent(
+            'createOrder', request_caller(info, buyer_id), idempotency_key,
+            {'buyer_id': buyer_id, 'shipping_address': shipping_address, 'items': quantities},
+            create, lambda order: order.pk, lambda pk: Order.objects.get(pk=pk)
+        )
+        return CreateOrder(order=order)
 
-            item = OrderItem(order=order, product=product, quantity=item_data.quantity, unit_price=item_data.unit_price)
-            item.save()
-            total_amount += item_data.quantity * item_data.unit_price
+class CheckoutCart(graphene.Mutation):
+    """Order everything in the caller's cart and empty it."""
+    order = graphene.Field(OrderType)
 
-        order.total_amount = total_amount
-        order.save()
-        return CreateOrder(order=order)
+    class Arguments:
+        shipping_address = graphene.String(required=True)
+
+    @login_required
+    def mutate(self, info, shipping_address):
+        user = info.context.user
+        if user.role != 'buyer':
+            raise GraphQLError('Only buyers can check out')
+        return CheckoutCart(order=checkout_cart(user, shipping_address))
 
 class UpdateOrderStatus(graphene.Mutation):
     order = graphene.Field(OrderType)
@@ -90,17 +127,50 @@ class UpdateOrderStatus(graphene.Mutation):
     class Arguments:
         id = graphene.UUID(required=True)
         status = graphene.String(required=True)
+        tracking_number = graphene.String()
+
+    @login_required
+    def mutate(self, info, id, status, tracking_number=None):
+        user = info.context.user
+        if user.role not in STATUS_UPDATE_ROLES:
+            raise GraphQLError('Only sellers and platform admins can update order statuses')
+        applied, message = update_order_statuses([(id, status, tracking_number)], user)[str(id)]
+        if not applied:
+            raise GraphQLError(message)
+        return UpdateOrderStatus(order=with_items(Order.objects.select_related('buyer')).get(id=id))
+
+class OrderStatusOutcome(graphene.ObjectType):
+    id = graphene.UUID()
+    applied = graphene.Boolean()
+    message = graphene.String()
+
+class BulkUpdateOrderStatus(graphene.Mutation):
+    """Change the status of many orders at once, e.g. marking them shipped."""
+    applied_count = graphene.Int()
+    outcomes = graphene.List(OrderStatusOutcome)
 
-    def mutate(self, info, id, status):
-        try:
-            order = Order.objects.get(id=id)
-        except Order.DoesNotExist:
-            raise GraphQLError('Order not found')
-
-        order.status = status
-        order.save()
-        return UpdateOrderStatus(order=order)
+    class Arguments:
+        updates = graphene.List(graphene.NonNull(OrderStatusUpdateInput), required=True)
+
+    @login_required
+    def mutate(self, info, updates):
+        user = info.context.user
+        if user.role != 'platform_admin':
+            raise GraphQLError('Only platform admins can update order statuses in bulk')
+        if len(updates) > MAX_STATUS_BATCH:
+            raise GraphQLError(f'At most {MAX_STATUS_BATCH} orders can be updated at once')
+
+        outcomes = update_order_statuses(
+            [(update.id, update.status, update.tracking_number) for update in updates], user
+        )
+        return BulkUpdateOrderStatus(
+            applied_count=sum(applied for applied, _ in outcomes.values()),
+            outcomes=[OrderStatusOutcome(id=order_id, applied=applied, message=message)
+                      for order_id, (applied, message) in outcomes.items()]
+        )
 
 class OrderMutation(graphene.ObjectType):
     create_order = CreateOrder.Field()
+    checkout_cart = CheckoutCart.Field()
     update_order_status = UpdateOrderStatus.Field()
+    bulk_update_order_status = BulkUpdateOrderStatus.Field()
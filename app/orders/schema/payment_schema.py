@@ -2,6 +2,7 @@ import graphene
 from graphene_django import DjangoObjectType
 from orders.models import Payment, Order
 from graphql import GraphQLError
+from common.idempotency import request_caller, run_idempotent
 
 # -------- Types --------
 class PaymentType(DjangoObjectType):
@@ -19,21 +20,31 @@ class CreatePayment(graphene.Mutation):
         status = graphene.String(required=True)
         payment_date = graphene.DateTime(required=True)
         transaction_reference = graphene.String(required=True)
+        idempotency_key = graphene.String(description="Retries with the same key return the first payment")
 
-    def mutate(self, info, order_id, payment_method, status, payment_date, transaction_reference):
-        try:
-            order = Order.objects.get(id=order_id)
-        except Order.DoesNotExist:
-            raise GraphQLError('Order not found')
+    def mutate(self, info, order_id, payment_method, status, payment_date, transaction_reference, idempotency_key=None):
+        def create():
+            try:
+                order = Order.objects.get(id=order_id)
+            except Order.DoesNotExist:
+                raise GraphQLError('Order not found')
 
-        payment = Payment(
-            order=order,
-            payment_method=payment_method,
-            status=status,
-            payment_date=payment_date,
-            transaction_reference=transaction_reference
+            payment = Payment(
+                order=order,
+                payment_method=payment_method,
+                status=status,
+                payment_date=payment_date,
+                transaction_reference=transaction_reference
+            )
+            payment.save()
+            return payment
+
+        arguments = {'order_id': order_id, 'payment_method': payment_method, 'status': status,
+                     'payment_date': payment_date, 'transaction_reference': transaction_reference}
+        payment = run_idempotent(
+            'createPayment', request_caller(info, order_id), idempotency_key, arguments,
+            create, lambda payment: payment.pk, lambda pk: Payment.objects.get(pk=pk)
         )
-        payment.save()
         return CreatePayment(payment=payment)
 
 class PaymentMutation(graphene.ObjectType):
@@ -0,0 +1,219 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.db import connection, transaction
+from graphql import GraphQLError
+from cart.models import Cart, CartItem
+from common.counts import bump_model_version
+from orders.models import Order, OrderItem, OrderStatusHistory
+from products.cache import invalidate_product_listings_on_commit
+from products.models import Product
+from users.models import User
+
+MAX_STATUS_BATCH = 1000
+
+
+def merge_lines(lines: Iterable[Tuple[object, int]]) -> Dict[str, int]:
+    """Sum quantities per product, rejecting non-positive quantities."""
+    quantities: Dict[str, int] = {}
+    for product_id, quantity in lines:
+        if quantity is None or quantity <= 0:
+            raise GraphQLError('Quantity must be positive')
+        quantities[str(product_id)] = quantities.get(str(product_id), 0) + quantity
+    return quantities
+
+
+def reserve_stock(quantities: Dict[str, int]) -> Dict[str, Product]:
+    """Lock the ordered products and decrement their stock.
+
+    Products are fetched and locked in one query, in primary key order so
+    concurrent orders cannot deadlock, then decremented with one conditional
+    UPDATE. Must run inside a transaction.
+    """
+    products = {
+        str(product.pk): product
+        for product in Product.objects.select_for_update()
+        .filter(pk__in=list(quantities)).only('id', 'price', 'stock_quantity', 'category_id').order_by('pk')
+    }
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            raise GraphQLError(f'Product {product_id} not found')
+        if product.stock_quantity < quantity:
+            raise GraphQLError(f'Insufficient stock for product {product_id}')
+
+    values = ', '.join(['(%s::uuid, %s::integer)'] * len(quantities))
+    params = [value for line in quantities.items() for value in line]
+    table = Product._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} AS p SET stock_quantity = p.stock_quantity - lines.quantity
+            FROM (VALUES {values}) AS lines (id, quantity)
+            WHERE p.id = lines.id AND p.stock_quantity >= lines.quantity
+            """,
+            params,
+        )
+        if cursor.rowcount != len(quantities):
+            raise GraphQLError('Insufficient stock')
+    return products
+
+
+def release_stock(order_ids: List[str]) -> set:
+    """Return the stock held by order items to their products.
+
+    Products are locked in primary key order first, like reserve_stock, so
+    releases and reservations cannot deadlock. Must run inside a
+    transaction; returns the categories of the restocked products.
+    """
+    product_ids = list(OrderItem.objects.filter(order_id__in=order_ids).values_list('product_id', flat=True).distinct())
+    if not product_ids:
+        return set()
+    list(Product.objects.select_for_update().filter(pk__in=product_ids).order_by('pk').values_list('pk', flat=True))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {Product._meta.db_table} AS p SET stock_quantity = p.stock_quantity + items.quantity
+            FROM (
+                SELECT product_id, sum(quantity) AS quantity FROM {OrderItem._meta.db_table}
+                WHERE order_id = ANY(%s::uuid[])
+                GROUP BY product_id
+            ) AS items
+            WHERE p.id = items.product_id
+            RETURNING p.category_id
+            """,
+            [list(order_ids)],
+        )
+        return {category_id for category_id, in cursor.fetchall()}
+
+
+def place_order(buyer: User, shipping_address: str, quantities: Dict[str, int]) -> Order:
+    """Create an order priced from the catalog, reserving stock, in one transaction.
+
+    Costs a constant number of queries whatever the number of lines.
+    """
+    if not quantities:
+        raise GraphQLError('Order must contain at least one item')
+    with transaction.atomic():
+        products = reserve_stock(quantities)
+        items = [
+            OrderItem(product_id=product_id, quantity=quantity, unit_price=products[product_id].price)
+            for product_id, quantity in quantities.items()
+        ]
+        order = Order.objects.create(
+            buyer=buyer,
+            shipping_address=shipping_address,
+            total_amount=sum(item.quantity * item.unit_price for item in items),
+            status='pending',
+        )
+        for item in items:
+            item.order = order
+        OrderItem.objects.bulk_create(items)
+        invalidate_product_listings_on_commit(*{product.category_id for product in products.values()})
+    return order
+
+
+def checkout_cart(user: User, shipping_address: str) -> Order:
+    """Turn the user's cart into an order and empty the cart, in one transaction.
+
+    The cart row is locked first so a repeated checkout waits and then finds
+    the cart empty instead of ordering twice.
+    """
+    with transaction.atomic():
+        cart = Cart.objects.select_for_update().filter(user=user).first()
+        lines = CartItem.objects.filter(cart=cart).values_list('product_id', 'quantity') if cart else []
+        quantities = merge_lines(lines)
+        if not quantities:
+            raise GraphQLError('Cart is empty')
+        order = place_order(user, shipping_address, quantities)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {CartItem._meta.db_table} WHERE cart_id = %s', [cart.pk])
+    bump_model_version(CartItem)
+    return order
+
+
+def allowed_sources(status: str) -> List[str]:
+    """Statuses an order may move to status from."""
+    return [source for source, targets in Order.STATUS_TRANSITIONS.items() if status in targets]
+
+
+def update_order_statuses(updates: Iterable[Tuple[object, str, Optional[str]]],
+                          user: Optional[User] = None) -> Dict[str, Tuple[bool, str]]:
+    """Apply (order id, status, tracking number) changes with one set-based UPDATE.
+
+    Each order only changes when Order.STATUS_TRANSITIONS allows moving from
+    its current status; rows are locked by the same statement, so the check
+    holds under concurrent updates. Cancelled orders release their stock in
+    the same transaction, and tracking numbers are only accepted when
+    shipping. Applied changes are logged with a single batched insert into
+    OrderStatusHistory. Returns (applied, message) per
+    order id, in request order.
+    """
+    outcomes: Dict[str, Tuple[bool, str]] = {}
+    requested: Dict[str, Tuple[str, Optional[str]]] = {}
+    order_ids: List[str] = []
+    for order_id, status, tracking_number in updates:
+        order_id = str(order_id)
+        order_ids.append(order_id)
+        if order_id in requested or order_id in outcomes:
+            outcomes[order_id] = (False, 'Order listed more than once')
+            requested.pop(order_id, None)
+        elif status not in Order.STATUS_TRANSITIONS:
+            outcomes[order_id] = (False, f'Invalid status {status}')
+        elif tracking_number and status != 'shipped':
+            outcomes[order_id] = (False, 'A tracking number can only be set when shipping')
+        else:
+            requested[order_id] = (status, tracking_number)
+    if requested:
+        _apply_status_updates(requested, outcomes, user)
+    return {order_id: outcomes[order_id] for order_id in dict.fromkeys(order_ids)}
+
+
+def _apply_status_updates(requested: Dict[str, Tuple[str, Optional[str]]],
+                          outcomes: Dict[str, Tuple[bool, str]], user: Optional[User]) -> None:
+    """Run the locking UPDATE for validated requests and record the outcome of each."""
+    values = ', '.join(['(%s::uuid, %s::varchar, %s::varchar, %s::varchar[])'] * len(requested))
+    params = [
+        value for order_id, (status, tracking_number) in requested.items()
+        for value in (order_id, status, tracking_number, allowed_sources(status))
+    ]
+    table = Order._meta.db_table
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH requested (id, status, tracking_number, allowed_from) AS (VALUES {values}),
+                previous AS (
+                    SELECT o.id, o.status FROM {table} AS o
+                    JOIN requested ON requested.id = o.id
+                    ORDER BY o.id
+                    FOR UPDATE OF o
+                )
+                UPDATE {table} AS o SET
+                    status = requested.status,
+                    tracking_number = coalesce(requested.tracking_number, o.tracking_number),
+                    updated_at = now()
+                FROM requested JOIN previous ON previous.id = requested.id
+                WHERE o.id = requested.id AND previous.status = ANY(requested.allowed_from)
+                RETURNING o.id, previous.status, o.status, o.tracking_number
+                """,
+                params,
+            )
+            applied = cursor.fetchall()
+        cancelled = [str(order_id) for order_id, _, to_status, _ in applied if to_status == 'cancelled']
+        if cancelled:
+            invalidate_product_listings_on_commit(*release_stock(cancelled))
+        OrderStatusHistory.objects.bulk_create([
+            OrderStatusHistory(order_id=order_id, from_status=from_status, to_status=to_status,
+                               tracking_number=tracking_number, changed_by=user)
+            for order_id, from_status, to_status, tracking_number in applied
+        ])
+    for order_id, from_status, to_status, _ in applied:
+        outcomes[str(order_id)] = (True, f'{from_status} -> {to_status}')
+
+    rejected = [order_id for order_id in requested if order_id not in outcomes]
+    if rejected:
+        current = {str(order_id): status for order_id, status in Order.objects.filter(id__in=rejected).values_list('id', 'status')}
+        for order_id in rejected:
+            if order_id not in current:
+                outcomes[order_id] = (False, 'Order not found')
+            else:
+                outcomes[order_id] = (False, f'Cannot change status from {current[order_id]} to {requested[order_id][0]}')
@@ -1,3 +1,250 @@
-from django.test import TestCase
+import datetime
+import threading
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql import GraphQLError
+from cart.models import Cart, CartItem
+from common.cache import get_version
+from common.idempotency import KEY_TTL
+from common.models import IdempotencyKey
+from common.testing import execute, isolated_cache, make_product, make_user
+from orders.models import Order, OrderStatusHistory
+from orders.services import place_order, update_order_statuses
+from products.cache import PRODUCT_LISTING_SCOPE
+from products.models import Product
 
-# Create your tests here.
+CREATE_ORDER = '''
+    mutation($buyerId: UUID!, $items: [OrderItemInput]!, $key: String) {
+        createOrder(buyerId: $buyerId, shippingAddress: "1 Main St", items: $items, idempotencyKey: $key) {
+            order { id totalAmount items { quantity unitPrice } }
+        }
+    }
+'''
+
+UPDATE_ORDER_STATUS = '''
+    mutation($id: UUID!, $status: String!) {
+        updateOrderStatus(id: $id, status: $status) {
+            order { id statusHistory { toStatus changedBy { id } } }
+        }
+    }
+'''
+
+
+@isolated_cache
+class CreateOrderTests(TestCase):
+    def setUp(self):
+        self.buyer = make_user()
+        self.rug = make_product(price=120.0, stock_quantity=5)
+        self.vase = make_product(price=30.0, stock_quantity=2)
+
+    def create_order(self, items, key=None):
+        return execute(CREATE_ORDER, variables={'buyerId': str(self.buyer.id), 'items': items, 'key': key})
+
+    def test_items_are_priced_from_the_catalog(self):
+        result = self.create_order([
+            {'productId': str(self.rug.id), 'quantity': 2, 'unitPrice': 0.01},
+            {'productId': str(self.vase.id), 'quantity': 1},
+        ])
+        self.assertIsNone(result.errors)
+        order = result.data['createOrder']['order']
+        self.assertEqual(order['totalAmount'], 270.0)
+        self.assertEqual(sorted(item['unitPrice'] for item in order['items']), [30.0, 120.0])
+        self.rug.refresh_from_db()
+        self.assertEqual(self.rug.stock_quantity, 3)
+
+    def test_oversell_is_rejected_and_nothing_is_written(self):
+        result = self.create_order([
+            {'productId': str(self.rug.id), 'quantity': 1},
+            {'productId': str(self.vase.id), 'quantity': 3},
+        ])
+        self.assertIn('Insufficient stock', result.errors[0].message)
+        self.assertFalse(Order.objects.exists())
+        self.rug.refresh_from_db()
+        self.assertEqual(self.rug.stock_quantity, 5)
+
+    def test_replay_with_the_same_key_returns_the_first_order(self):
+        items = [{'productId': str(self.rug.id), 'quantity': 1}]
+        first = self.create_order(items, key='retry-1')
+        second = self.create_order(items, key='retry-1')
+        self.assertIsNone(second.errors)
+        self.assertEqual(first.data['createOrder']['order']['id'], second.data['createOrder']['order']['id'])
+        self.assertEqual(Order.objects.count(), 1)
+        self.rug.refresh_from_db()
+        self.assertEqual(self.rug.stock_quantity, 4)
+
+    def test_keys_are_scoped_to_the_caller(self):
+        other_buyer = make_user()
+        items = [{'productId': str(self.rug.id), 'quantity': 1}]
+        first = self.create_order(items, key='shared-key')
+        second = execute(CREATE_ORDER, user=other_buyer,
+                         variables={'buyerId': str(other_buyer.id), 'items': items, 'key': 'shared-key'})
+        self.assertIsNone(second.errors)
+        self.assertNotEqual(first.data['createOrder']['order']['id'], second.data['createOrder']['order']['id'])
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_reusing_a_key_with_other_arguments_is_rejected(self):
+        self.create_order([{'productId': str(self.rug.id), 'quantity': 1}], key='retry-2')
+        result = self.create_order([{'productId': str(self.rug.id), 'quantity': 2}], key='retry-2')
+        self.assertIn('different arguments', result.errors[0].message)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_key_runs_the_mutation_again(self):
+        items = [{'productId': str(self.rug.id), 'quantity': 1}]
+        self.create_order(items, key='retry-3')
+        IdempotencyKey.objects.update(created_at=timezone.now() - datetime.timedelta(seconds=KEY_TTL + 1))
+        self.assertIsNone(self.create_order(items, key='retry-3').errors)
+        self.assertEqual(Order.objects.count(), 2)
+
+
+@isolated_cache
+class CheckoutCartTests(TestCase):
+    CHECKOUT = 'mutation { checkoutCart(shippingAddress: "1 Main St") { order { totalAmount items { quantity } } } }'
+
+    def setUp(self):
+        self.buyer = make_user()
+        self.cart = Cart.objects.create(user=self.buyer)
+        self.product = make_product(price=25.0, stock_quantity=4)
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=3, price_at_add=1)
+
+    def test_checkout_orders_the_cart_and_empties_it(self):
+        result = execute(self.CHECKOUT, user=self.buyer)
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['checkoutCart']['order']['totalAmount'], 75.0)
+        self.assertFalse(CartItem.objects.filter(cart=self.cart).exists())
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 1)
+        self.assertEqual(execute(self.CHECKOUT, user=self.buyer).errors[0].message, 'Cart is empty')
+
+    def test_failed_checkout_keeps_the_cart(self):
+        CartItem.objects.filter(cart=self.cart).update(quantity=5)
+        result = execute(self.CHECKOUT, user=self.buyer)
+        self.assertIn('Insufficient stock', result.errors[0].message)
+        self.assertTrue(CartItem.objects.filter(cart=self.cart).exists())
+        self.assertFalse(Order.objects.exists())
+
+
+@isolated_cache
+class ListingInvalidationTests(TestCase):
+    def test_listings_are_invalidated_only_once_the_order_commits(self):
+        product = make_product(stock_quantity=5)
+        version = get_version(PRODUCT_LISTING_SCOPE)
+        with self.captureOnCommitCallbacks(execute=True):
+            order = place_order(make_user(), '1 Main St', {str(product.id): 1})
+            self.assertEqual(get_version(PRODUCT_LISTING_SCOPE), version)
+        self.assertNotEqual(get_version(PRODUCT_LISTING_SCOPE), version)
+
+        version = get_version(PRODUCT_LISTING_SCOPE)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_order_statuses([(order.id, 'cancelled', None)])
+            self.assertEqual(get_version(PRODUCT_LISTING_SCOPE), version)
+        self.assertNotEqual(get_version(PRODUCT_LISTING_SCOPE), version)
+
+
+@isolated_cache
+class ConcurrentOrderTests(TransactionTestCase):
+    def test_concurrent_buyers_never_oversell(self):
+        buyer = make_user()
+        product = make_product(stock_quantity=3)
+        outcomes = []
+
+        def buy():
+            try:
+                place_order(buyer, '1 Main St', {str(product.id): 1})
+                outcomes.append('ordered')
+            except GraphQLError:
+                outcomes.append('rejected')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes.count('ordered'), 3)
+        self.assertEqual(Order.objects.count(), 3)
+        self.assertEqual(Product.objects.get(pk=product.pk).stock_quantity, 0)
+
+
+@isolated_cache
+class OrderStatusTests(TestCase):
+    def setUp(self):
+        self.product = make_product(stock_quantity=10)
+        self.order = place_order(make_user(), '1 Main St', {str(self.product.id): 3})
+
+    def test_illegal_transitions_are_refused(self):
+        for status in ('shipped', 'delivered', 'pending'):
+            with self.subTest(status=status):
+                applied, message = update_order_statuses([(self.order.id, status, None)])[str(self.order.id)]
+                self.assertFalse(applied)
+                self.assertEqual(message, f'Cannot change status from pending to {status}')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'pending')
+        self.assertFalse(OrderStatusHistory.objects.exists())
+
+    def test_final_statuses_cannot_change(self):
+        update_order_statuses([(self.order.id, 'cancelled', None)])
+        applied, _ = update_order_statuses([(self.order.id, 'paid', None)])[str(self.order.id)]
+        self.assertFalse(applied)
+
+    def test_allowed_transitions_are_logged(self):
+        update_order_statuses([(self.order.id, 'paid', None)])
+        update_order_statuses([(self.order.id, 'shipped', 'TRK-1')])
+        history = list(OrderStatusHistory.objects.filter(order=self.order).order_by('changed_at')
+                       .values_list('from_status', 'to_status', 'tracking_number'))
+        self.assertEqual(history, [('pending', 'paid', None), ('paid', 'shipped', 'TRK-1')])
+
+    def test_update_order_status_mutation_rejects_illegal_transition(self):
+        result = execute(UPDATE_ORDER_STATUS, user=make_user('platform_admin'),
+                         variables={'id': str(self.order.id), 'status': 'delivered'})
+        self.assertEqual(result.errors[0].message, 'Cannot change status from pending to delivered')
+
+    def test_update_order_status_mutation_requires_a_seller_or_admin(self):
+        for user in (None, make_user()):
+            with self.subTest(user=user):
+                result = execute(UPDATE_ORDER_STATUS, user=user, variables={'id': str(self.order.id), 'status': 'cancelled'})
+                self.assertIsNotNone(result.errors)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'pending')
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 7)
+
+        artisan = make_user('artisan')
+        result = execute(UPDATE_ORDER_STATUS, user=artisan, variables={'id': str(self.order.id), 'status': 'paid'})
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['updateOrderStatus']['order']['statusHistory'],
+                         [{'toStatus': 'PAID', 'changedBy': {'id': str(artisan.id)}}])
+
+    def test_status_history_costs_a_constant_number_of_queries(self):
+        admin = make_user('platform_admin')
+        for _ in range(6):
+            order = place_order(make_user(), '1 Main St', {str(self.product.id): 1})
+            update_order_statuses([(order.id, 'paid', None)], admin)
+
+        def query_count(size):
+            with CaptureQueriesContext(connection) as queries:
+                result = execute('query($size: Int) { allOrders(pagination: {pageSize: $size}) '
+                                 '{ orders { statusHistory { toStatus changedBy { id } } } } }',
+                                 variables={'size': size})
+            self.assertIsNone(result.errors)
+            self.assertEqual(len(result.data['allOrders']['orders']), size)
+            return len(queries.captured_queries)
+
+        self.assertEqual(query_count(3), query_count(7))
+
+    def test_cancellation_releases_reserved_stock(self):
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 7)
+        applied, _ = update_order_statuses([(self.order.id, 'cancelled', None)])[str(self.order.id)]
+        self.assertTrue(applied)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 10)
+        # A refused second cancellation must not release the stock again
+        update_order_statuses([(self.order.id, 'cancelled', None)])
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock_quantity, 10)
+
+    def test_tracking_number_is_only_accepted_when_shipping(self):
+        applied, message = update_order_statuses([(self.order.id, 'cancelled', 'TRK-1')])[str(self.order.id)]
+        self.assertFalse(applied)
+        self.assertEqual(message, 'A tracking number can only be set when shipping')
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.tracking_number), ('pending', None))
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from typing import Any, Callable, Iterable, List, Tuple
+from common.cache import bump_versions, get_cached, make_key, normalize_arguments, set_cached
+from common.loaders import remember_peers
+from common.pagination import PageInfo, PaginationInput, lazy_page_info, paginate_queryset
+
+LISTING_CACHE_TIMEOUT = getattr(settings, 'PRODUCT_LISTING_CACHE_TIMEOUT', 300)
+
+PRODUCT_LISTING_SCOPE = 'product-listing'
+CATEGORY_LISTING_SCOPE = 'category-listing'
+
+# Page info flags stored with a cached page; counts stay lazy
+PAGE_INFO_FIELDS = ('has_next_page', 'has_previous_page', 'current_page', 'end_cursor')
+
+
+def category_scope(category_id) -> str:
+    return f'{PRODUCT_LISTING_SCOPE}:category:{category_id}'
+
+
+def listing_scopes(category_ids: Iterable) -> List[str]:
+    """Version counters a product listing depends on.
+
+    Listings restricted to categories only depend on those categories;
+    everything else depends on the global product listing version.
+    """
+    category_ids = sorted({str(category_id) for category_id in category_ids or () if category_id})
+    return [category_scope(category_id) for category_id in category_ids] or [PRODUCT_LISTING_SCOPE]
+
+
+def invalidate_product_listings(*category_ids) -> None:
+    """Invalidate cached product listings after products in these categories changed."""
+    bump_versions([PRODUCT_LISTING_SCOPE, *(category_scope(category_id) for category_id in category_ids if category_id)])
+
+
+def invalidate_product_listings_on_commit(*category_ids) -> None:
+    """Invalidate product listings once the current transaction commits.
+
+    Invalidating earlier would let a concurrent read cache the rows as they
+    were before the commit under the new version.
+    """
+    transaction.on_commit(lambda: invalidate_product_listings(*category_ids))
+
+
+def invalidate_category_listings(*category_ids) -> None:
+    """Invalidate cached categories, and product listings showing the changed categories."""
+    bump_versions([CATEGORY_LISTING_SCOPE])
+    if category_ids:
+        invalidate_product_listings(*category_ids)
+
+
+def cached_product_page(queryset: QuerySet, pagination: PaginationInput, category_ids: Iterable,
+                        arguments: dict) -> Tuple[Any, PageInfo]:
+    """Paginate a product listing, serving the page from cache when possible."""
+    key = make_key('product-page', listing_scopes(category_ids), normalize_arguments(arguments))
+    cached = get_cached(key)
+    if cached is not None:
+        products, page_info_fields, page_size = cached
+        return remember_peers(products), lazy_page_info(queryset, page_size, **page_info_fields)
+
+    products, page_info = paginate_queryset(queryset, pagination)
+    page_info_fields = {field: getattr(page_info, field) for field in PAGE_INFO_FIELDS}
+    set_cached(key, (products, page_info_fields, page_info.page_size), LISTING_CACHE_TIMEOUT)
+    return products, page_info
+
+
+def cached_categories(fetch: Callable[[], Iterable]) -> list:
+    """Return all categories, served from cache until a category changes."""
+    key = make_key('categories', [CATEGORY_LISTING_SCOPE], {})
+    categories = get_cached(key)
+    if categories is None:
+        categories = list(fetch())
+        set_cached(key, categories, LISTING_CACHE_TIMEOUT)
+    return categories
@@ -0,0 +1,112 @@
+"""Streaming catalog export as JSON Lines or CSV.
+
+Products are read through a server-side cursor in chunks; each chunk gets
+its translations, images and owner names in one query each and is written
+out before the next one is fetched, so memory stays bounded by the chunk.
+"""
+import csv
+import datetime
+import json
+import zlib
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from products.loaders import batch_load_owner_names, owner_key
+from products.models import Product
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('jsonl', 'csv')
+CSV_COLUMNS = (
+    'id', 'title', 'description', 'price', 'stock_quantity', 'category_id', 'category_name',
+    'owner_type', 'owner_id', 'owner_name', 'rating_avg', 'rating_count', 'updated_at', 'image_urls', 'translations',
+)
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def export_queryset(updated_since: Optional[datetime.datetime] = None) -> QuerySet:
+    """Approved products, optionally only those changed since a point in time."""
+    queryset = (
+        Product.objects.filter(status='approved')
+        .select_related('category')
+        .prefetch_related('translations', 'images')
+        .defer('search_vector')
+        .order_by('pk')
+    )
+    if updated_since is not None:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    return queryset
+
+
+def product_record(product: Product, owner_name: Optional[str]) -> Dict[str, Any]:
+    return {
+        'id': product.pk,
+        'title': product.title,
+        'description': product.description,
+        'price': product.price,
+        'stock_quantity': product.stock_quantity,
+        'category': {'id': product.category_id, 'name': product.category.name} if product.category_id else None,
+        'owner': {'type': product.owner_type, 'id': product.owner_id, 'name': owner_name},
+        'rating_avg': product.rating_avg,
+        'rating_count': product.rating_count,
+        'updated_at': product.updated_at,
+        'translations': [
+            {'language_code': translation.language_code, 'title': translation.title, 'description': translation.description}
+            for translation in product.translations.all()
+        ],
+        'images': [image.image_url for image in product.images.all()],
+    }
+
+
+def iter_records(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[list]:
+    """Yield lists of product records, one per server-side cursor chunk."""
+    products = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(products, chunk_size))
+        if not chunk:
+            return
+        owner_names = batch_load_owner_names(list({owner_key(product) for product in chunk}))
+        yield [product_record(product, owner_names.get(owner_key(product))) for product in chunk]
+
+
+def to_jsonl(chunks: Iterable[list]) -> Iterator[str]:
+    for records in chunks:
+        yield ''.join(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for record in records)
+
+
+class _Buffer:
+    """File-like object handing back what csv.writer writes."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def to_csv(chunks: Iterable[list]) -> Iterator[str]:
+    writer = csv.writer(_Buffer())
+    yield writer.writerow(CSV_COLUMNS)
+    for records in chunks:
+        yield ''.join(writer.writerow([
+            record['id'], record['title'], record['description'], record['price'], record['stock_quantity'],
+            record['category'] and record['category']['id'], record['category'] and record['category']['name'],
+            record['owner']['type'], record['owner']['id'], record['owner']['name'],
+            record['rating_avg'], record['rating_count'], record['updated_at'].isoformat(),
+            '|'.join(record['images']), json.dumps(record['translations'], ensure_ascii=False),
+        ]) for record in records)
+
+
+def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Gzip-compress a stream of text chunks incrementally."""
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_catalog(file_format: str, updated_since: Optional[datetime.datetime] = None,
+                   compress: bool = False, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator:
+    """Stream the approved catalog as text chunks, or gzip bytes when compress is set."""
+    chunks = iter_records(export_queryset(updated_since), chunk_size)
+    lines = to_csv(chunks) if file_format == 'csv' else to_jsonl(chunks)
+    return gzip_stream(lines) if compress else lines
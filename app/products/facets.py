@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, CharField, F, QuerySet, Value, When
+from django.db.models.functions import Floor
+from common.cache import get_cached, set_cached
+from common.counts import count_signature, get_model_version
+from products.models import Product
+from products.review_model import Review
+from typing import Dict, List
+
+# Upper bounds of the price buckets; prices above the last bound share one bucket
+PRICE_BUCKETS = getattr(settings, 'PRODUCT_PRICE_BUCKETS', [50, 100, 250, 500])
+FACET_CACHE_TIMEOUT = getattr(settings, 'PRODUCT_FACET_CACHE_TIMEOUT', 60)
+
+FACET_COLUMNS = ('category', 'owner_type', 'price_range', 'rating')
+
+
+def price_range():
+    """Expression labelling a product with its price bucket, e.g. '50-100'."""
+    bounds = [0, *PRICE_BUCKETS]
+    whens = [
+        When(price__lt=upper, then=Value(f'{lower}-{upper}'))
+        for lower, upper in zip(bounds, bounds[1:])
+    ]
+    return Case(*whens, default=Value(f'{bounds[-1]}+'), output_field=CharField())
+
+
+def _facet_rows(queryset: QuerySet) -> List[tuple]:
+    """Count the queryset per facet value with one GROUPING SETS aggregation."""
+    facet_values = queryset.order_by().values(
+        facet_category=F('category_id'),
+        facet_category_name=F('category__name'),
+        facet_owner_type=F('owner_type'),
+        facet_price_range=price_range(),
+        facet_rating=Case(When(rating_count=0, then=None), default=Floor('rating_avg')),
+    )
+    inner_sql, params = facet_values.query.sql_with_params()
+    sql = f"""
+        SELECT GROUPING(facet_category, facet_category_name), GROUPING(facet_owner_type),
+               GROUPING(facet_price_range), GROUPING(facet_rating),
+               facet_category, facet_category_name, facet_owner_type, facet_price_range, facet_rating, COUNT(*)
+        FROM ({inner_sql}) AS facet_values
+        GROUP BY GROUPING SETS (
+            (facet_category, facet_category_name), (facet_owner_type), (facet_price_range), (facet_rating)
+        )
+    """
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def compute_facets(queryset: QuerySet) -> Dict[str, List[dict]]:
+    """Return facet counts for a filtered product queryset.
+
+    Results are cached briefly per filter signature and invalidated whenever
+    products or reviews are written.
+    """
+    key = 'product-facets:{}:{}:{}'.format(
+        get_model_version(Product), get_model_version(Review), count_signature(queryset)
+    )
+    facets = get_cached(key)
+    if facets is None:
+        facets = {column: [] for column in FACET_COLUMNS}
+        for *grouping, category, category_name, owner_type, bucket, rating, count in _facet_rows(queryset):
+            values = (
+                ('category', category and str(category), category_name),
+                ('owner_type', owner_type, owner_type),
+                ('price_range', bucket, bucket),
+                ('rating', rating and str(int(rating)), rating and str(int(rating))),
+            )
+            # Exactly one grouping flag is 0: the facet this row counts
+            column, value, label = values[grouping.index(0)]
+            facets[column].append({'value': value, 'label': label, 'count': count})
+        set_cached(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,24 @@
+from django.db.models import QuerySet
+
+
+def filter_products(queryset: QuerySet, filters) -> QuerySet:
+    """Apply a ProductFilterInput to a product queryset.
+
+    Every filter is optional; unset filters are ignored.
+    """
+    if not filters:
+        return queryset
+
+    if filters.price_min is not None:
+        queryset = queryset.filter(price__gte=filters.price_min)
+    if filters.price_max is not None:
+        queryset = queryset.filter(price__lte=filters.price_max)
+    if filters.owner_type:
+        queryset = queryset.filter(owner_type=filters.owner_type)
+    if filters.status:
+        queryset = queryset.filter(status=filters.status)
+    if filters.category_ids:
+        queryset = queryset.filter(category_id__in=filters.category_ids)
+    if filters.min_rating is not None:
+        queryset = queryset.filter(rating_count__gt=0, rating_avg__gte=filters.min_rating)
+    return queryset
@@ -0,0 +1,270 @@
+"""Streaming bulk import of products from CSV or JSON Lines.
+
+Rows are read lazily and processed in fixed-size batches: each batch is
+validated with one lookup per owner table and one for categories, then
+inserted with bulk_create. Memory use depends on the batch size only.
+"""
+import csv
+import json
+import math
+import uuid
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import DatabaseError, transaction
+from associations.models import Artisan, Association
+from common.counts import bump_model_version
+from products.cache import invalidate_product_listings
+from products.models import Category, Product, ProductImage, ProductTranslation
+from products.search import update_search_vectors
+
+IMPORT_BATCH_SIZE = 1000
+# Errors kept for the report; further errors are only counted
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ('csv', 'jsonl')
+MAX_STOCK_QUANTITY = 2 ** 31 - 1  # Upper bound of the integer column
+
+validate_url = URLValidator()
+
+
+class ImportResult:
+    """Outcome of an import: row counts and the first MAX_REPORTED_ERRORS row errors."""
+
+    def __init__(self):
+        self.total = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors: List[Tuple[int, str]] = []
+        self.category_ids = set()
+
+    def add_error(self, row_number: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+
+def detect_format(filename: str) -> str:
+    extension = filename.rsplit('.', 1)[-1].lower()
+    return 'jsonl' if extension in ('jsonl', 'ndjson') else 'csv'
+
+
+def read_rows(lines: Iterable[str], file_format: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, raw row) from text lines, one row at a time.
+
+    CSV rows may carry translations as title_<lang>/description_<lang>
+    columns and images as '|'-separated image_urls; JSON Lines rows use
+    'translations' and 'images' lists.
+    """
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, row
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, ValueError(f'Invalid JSON: {e}')
+
+
+def _csv_translations(row: Dict[str, str]) -> List[Dict[str, str]]:
+    languages = [key[len('title_'):] for key in row if key and key.startswith('title_') and row[key]]
+    return [
+        {'language_code': language, 'title': row[f'title_{language}'], 'description': row.get(f'description_{language}') or ''}
+        for language in languages
+    ]
+
+
+def _text(value: Any, name: str, model=None, field: str = None) -> str:
+    """Check that value is a string fitting the model field's max_length."""
+    if not isinstance(value, str):
+        raise ValueError(f'{name} must be a string')
+    if '\x00' in value:
+        raise ValueError(f'{name} must not contain NUL characters')
+    max_length = model._meta.get_field(field).max_length if model else None
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{name} must be at most {max_length} characters')
+    return value
+
+
+def _parse_translations(translations: Any) -> List[Dict[str, str]]:
+    if not isinstance(translations, list):
+        raise ValueError('translations must be a list')
+    parsed = []
+    for translation in translations:
+        if not isinstance(translation, dict) or not translation.get('language_code') or not translation.get('title'):
+            raise ValueError('translations need language_code and title')
+        parsed.append({
+            'language_code': _text(translation['language_code'], 'translation language_code',
+                                   ProductTranslation, 'language_code'),
+            'title': _text(translation['title'], 'translation title', ProductTranslation, 'title'),
+            'description': _text(translation.get('description') or '', 'translation description'),
+        })
+    return parsed
+
+
+def _parse_images(images: Any) -> List[str]:
+    if not isinstance(images, list):
+        raise ValueError('images must be a list of URLs')
+    for url in images:
+        _text(url, 'image URL', ProductImage, 'image_url')
+        try:
+            validate_url(url)
+        except ValidationError:
+            raise ValueError(f'Invalid image URL: {url}')
+    return images
+
+
+def parse_row(raw: Any, file_format: str) -> Dict[str, Any]:
+    """Normalize and type-check one row; raises ValueError with a readable message.
+
+    Every value is checked against its column type and length, so a row
+    that passes never fails on insert.
+    """
+    if isinstance(raw, Exception):
+        raise raw
+    if not isinstance(raw, dict):
+        raise ValueError('Row must be an object')
+
+    title = _text(raw.get('title') or '', 'title').strip()
+    if not title:
+        raise ValueError('title is required')
+    if len(title) > Product._meta.get_field('title').max_length:
+        raise ValueError('title is too long')
+    description = _text(raw.get('description') or '', 'description')
+    owner_type = raw.get('owner_type')
+    if owner_type not in dict(Product.OWNER_TYPE_CHOICES):
+        raise ValueError('owner_type must be artisan or association')
+    try:
+        price = float(raw.get('price'))
+        stock_quantity = int(raw.get('stock_quantity') or 0)
+        owner_id = uuid.UUID(str(raw.get('owner_id')))
+        category_id = uuid.UUID(str(raw['category_id'])) if raw.get('category_id') else None
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid value: {e}')
+    if price < 0 or stock_quantity < 0:
+        raise ValueError('price and stock_quantity must not be negative')
+    if not math.isfinite(price) or stock_quantity > MAX_STOCK_QUANTITY:
+        raise ValueError('price or stock_quantity is out of range')
+
+    if file_format == 'csv':
+        translations = _csv_translations(raw)
+        images = [url.strip() for url in (raw.get('image_urls') or '').split('|') if url.strip()]
+    else:
+        translations = raw.get('translations') or []
+        images = raw.get('images') or []
+
+    return {
+        'title': title, 'description': description, 'price': price,
+        'stock_quantity': stock_quantity, 'owner_type': owner_type, 'owner_id': owner_id,
+        'category_id': category_id, 'translations': _parse_translations(translations),
+        'images': _parse_images(images),
+    }
+
+
+def _existing_ids(rows: List[Dict[str, Any]]) -> Tuple[set, set, set]:
+    """Owners and categories referenced by a batch that exist, one query per table."""
+    artisan_ids = {row['owner_id'] for row in rows if row['owner_type'] == 'artisan'}
+    association_ids = {row['owner_id'] for row in rows if row['owner_type'] == 'association'}
+    category_ids = {row['category_id'] for row in rows if row['category_id']}
+    return (
+        set(Artisan.objects.filter(user_id__in=artisan_ids).values_list('user_id', flat=True)) if artisan_ids else set(),
+        set(Association.objects.filter(id__in=association_ids).values_list('id', flat=True)) if association_ids else set(),
+        set(Category.objects.filter(id__in=category_ids).values_list('id', flat=True)) if category_ids else set(),
+    )
+
+
+def _insert(entries: List[Tuple[int, Product, list, list]]) -> None:
+    with transaction.atomic():
+        Product.objects.bulk_create([product for _, product, _, _ in entries])
+        ProductTranslation.objects.bulk_create([row for _, _, translations, _ in entries for row in translations])
+        ProductImage.objects.bulk_create([row for _, _, _, images in entries for row in images])
+        update_search_vectors([product.pk for _, product, _, _ in entries])
+
+
+def import_batch(batch: List[Tuple[int, Any]], file_format: str, result: ImportResult) -> None:
+    """Validate one batch set-based and insert its valid rows.
+
+    If the batch insert still fails, its rows are retried one by one so
+    only the failing rows are rejected.
+    """
+    parsed, errors = [], []
+    for number, raw in batch:
+        try:
+            parsed.append((number, parse_row(raw, file_format)))
+        except ValueError as e:
+            errors.append((number, str(e)))
+
+    artisans, associations, categories = _existing_ids([row for _, row in parsed])
+    entries = []
+    for number, row in parsed:
+        owners = artisans if row['owner_type'] == 'artisan' else associations
+        if row['owner_id'] not in owners:
+            errors.append((number, f"{row['owner_type'].capitalize()} owner not found"))
+            continue
+        if row['category_id'] and row['category_id'] not in categories:
+            errors.append((number, 'Category not found'))
+            continue
+        product = Product(
+            title=row['title'], description=row['description'], price=row['price'],
+            stock_quantity=row['stock_quantity'], owner_type=row['owner_type'], owner_id=row['owner_id'],
+            category_id=row['category_id'],
+        )
+        translations = [
+            ProductTranslation(product=product, language_code=translation['language_code'],
+                               title=translation['title'], description=translation['description'])
+            for translation in row['translations']
+        ]
+        images = [ProductImage(product=product, image_url=url) for url in row['images']]
+        entries.append((number, product, translations, images))
+
+    created = []
+    if entries:
+        try:
+            _insert(entries)
+            created = entries
+        except DatabaseError:
+            for entry in entries:
+                try:
+                    _insert([entry])
+                    created.append(entry)
+                except DatabaseError as e:
+                    errors.append((entry[0], f'Could not be saved: {str(e).splitlines()[0]}'))
+
+    # Parse errors are found before lookup and insert errors; report them all in row order
+    for number, message in sorted(errors):
+        result.add_error(number, message)
+    result.created += len(created)
+    result.category_ids.update(product.category_id for _, product, _, _ in created)
+
+
+def import_products(lines: Iterable[str], file_format: str, batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    """Import products from CSV or JSON Lines text lines, batch by batch.
+
+    Invalid rows are reported and skipped without aborting their batch.
+    Listing caches and counts are invalidated once at the end.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f'Unsupported format {file_format}')
+    result = ImportResult()
+    rows = read_rows(lines, file_format)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        result.total += len(batch)
+        import_batch(batch, file_format, result)
+
+    if result.created:
+        bump_model_version(Product)
+        invalidate_product_listings(*result.category_ids)
+    return result
+
+
+def decode_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode an uploaded file's byte lines as UTF-8, dropping a leading BOM."""
+    for number, line in enumerate(chunks):
+        text = line.decode('utf-8')
+        yield text.lstrip('\ufeff') if number == 0 else text
@@ -0,0 +1,33 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from associations.models import Artisan, Association
+from common.loaders import get_loaders, get_peers
+
+OwnerKey = Tuple[str, object]
+
+
+def owner_key(product) -> OwnerKey:
+    """Key identifying a product owner across both owner tables."""
+    return (product.owner_type, product.owner_id)
+
+
+def batch_load_owner_names(keys: List[OwnerKey]) -> Dict[OwnerKey, str]:
+    """Fetch owner names grouped by owner_type, one IN query per type."""
+    ids_by_type = defaultdict(list)
+    for owner_type, owner_id in keys:
+        ids_by_type[owner_type].append(owner_id)
+
+    names = {}
+    if ids_by_type['artisan']:
+        artisans = Artisan.objects.filter(user_id__in=ids_by_type['artisan']).values_list('user_id', 'user__name')
+        names.update((('artisan', user_id), name) for user_id, name in artisans)
+    if ids_by_type['association']:
+        associations = Association.objects.filter(id__in=ids_by_type['association']).values_list('id', 'name')
+        names.update((('association', association_id), name) for association_id, name in associations)
+    return names
+
+
+def load_owner_name(info, product) -> Optional[str]:
+    """Resolve a product owner's name, batched with the products loaded alongside it."""
+    loader = get_loaders(info).get('product_owner_name', batch_load_owner_names)
+    return loader.load(owner_key(product), [owner_key(peer) for peer in get_peers(product)])
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from products.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_catalog
+
+
+class Command(BaseCommand):
+    help = 'Stream the approved catalog as JSON Lines or CSV, optionally gzip-compressed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='jsonl')
+        parser.add_argument('--updated-since', help='Only products updated at or after this ISO 8601 datetime')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output')
+        parser.add_argument('--output', help='Output file, stdout when omitted')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per cursor round trip')
+
+    def handle(self, *args, **options):
+        updated_since = None
+        if options['updated_since']:
+            updated_since = parse_datetime(options['updated_since'])
+            if updated_since is None:
+                raise CommandError('--updated-since must be an ISO 8601 datetime')
+
+        chunks = export_catalog(options['format'], updated_since, options['gzip'], options['chunk_size'])
+        if options['output']:
+            mode = 'wb' if options['gzip'] else 'w'
+            with open(options['output'], mode, **({} if options['gzip'] else {'encoding': 'utf-8', 'newline': ''})) as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        elif options['gzip']:
+            # Compressed output bypasses the text wrapper of self.stdout
+            stream = getattr(self.stdout, 'buffer', None)
+            if stream is None:
+                raise CommandError('--gzip needs a binary stdout, use --output instead')
+            for chunk in chunks:
+                stream.write(chunk)
+            stream.flush()
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            self.stdout.flush()
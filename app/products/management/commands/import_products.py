@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.importer import FORMATS, IMPORT_BATCH_SIZE, detect_format, import_products
+
+
+class Command(BaseCommand):
+    help = 'Stream products from a CSV or JSON Lines file into the catalog in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON Lines file')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows validated and inserted together')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as source:
+                result = import_products(source, file_format, options['batch_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for row, message in result.errors:
+            self.stderr.write(f'row {row}: {message}')
+        if result.error_count > len(result.errors):
+            self.stderr.write(f'... and {result.error_count - len(result.errors)} more errors')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} of {result.total} rows, {result.error_count} rejected'))
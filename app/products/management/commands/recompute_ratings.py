@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.services import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized product rating aggregates from reviews in bulk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Products updated per statement')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = Product.objects.order_by('pk').values_list('pk', flat=True)
+        updated = 0
+        batch = []
+        for product_id in ids.iterator(chunk_size=batch_size):
+            batch.append(product_id)
+            if len(batch) == batch_size:
+                updated += recompute_ratings(batch)
+                batch = []
+        updated += recompute_ratings(batch)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed ratings for {updated} products'))
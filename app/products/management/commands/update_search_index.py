@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search vectors of products in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Products updated per statement')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = Product.objects.order_by('pk').values_list('pk', flat=True)
+        updated = 0
+        batch = []
+        for product_id in ids.iterator(chunk_size=batch_size):
+            batch.append(product_id)
+            if len(batch) == batch_size:
+                updated += update_search_vectors(batch)
+                batch = []
+        updated += update_search_vectors(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {updated} products'))
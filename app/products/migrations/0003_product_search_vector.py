@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Frozen copy of products.search.update_search_vectors, so the migration does
+# not change when the app code does
+BACKFILL_SEARCH_VECTORS = """
+    UPDATE products_product AS p SET search_vector =
+        setweight(to_tsvector('english'::regconfig, coalesce(p.title, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, coalesce(p.description, '')), 'B')
+        || coalesce((
+            SELECT tsvector_agg(
+                setweight(to_tsvector(config, coalesce(t.title, '')), 'A')
+                || setweight(to_tsvector(config, coalesce(t.description, '')), 'B')
+            )
+            FROM products_producttranslation AS t,
+                LATERAL (SELECT (CASE lower(split_part(t.language_code, '-', 1))
+                    WHEN 'en' THEN 'english' WHEN 'fr' THEN 'french' WHEN 'ar' THEN 'arabic'
+                    ELSE 'simple' END)::regconfig AS config) AS language
+            WHERE t.product_id = p.id
+        ), ''::tsvector)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_favorite_review'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE AGGREGATE tsvector_agg (tsvector) (SFUNC = tsvector_concat, STYPE = tsvector, INITCOND = '')",
+            reverse_sql="DROP AGGREGATE IF EXISTS tsvector_agg (tsvector)",
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTORS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:34
+
+from django.db import migrations, models
+
+
+# Frozen copy of products.services.recompute_ratings, so the migration does
+# not change when the app code does
+BACKFILL_RATINGS = """
+    UPDATE products_product AS p SET
+        rating_count = stats.total,
+        rating_sum = stats.rating_sum,
+        rating_avg = stats.rating_sum::double precision / stats.total,
+        rating_1_count = stats.rating_1,
+        rating_2_count = stats.rating_2,
+        rating_3_count = stats.rating_3,
+        rating_4_count = stats.rating_4,
+        rating_5_count = stats.rating_5
+    FROM (
+        SELECT product_id, count(*) AS total, sum(rating) AS rating_sum,
+            count(*) FILTER (WHERE rating = 1) AS rating_1,
+            count(*) FILTER (WHERE rating = 2) AS rating_2,
+            count(*) FILTER (WHERE rating = 3) AS rating_3,
+            count(*) FILTER (WHERE rating = 4) AS rating_4,
+            count(*) FILTER (WHERE rating = 5) AS rating_5
+        FROM products_review
+        GROUP BY product_id
+    ) AS stats
+    WHERE p.id = stats.product_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-rating_avg', '-id'], name='product_top_rated_idx'),
+        ),
+        migrations.RunSQL(BACKFILL_RATINGS, migrations.RunSQL.noop),
+    ]
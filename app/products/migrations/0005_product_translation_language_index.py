@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producttranslation',
+            index=models.Index(fields=['product', 'language_code'], name='product_translation_lang_idx'),
+        ),
+    ]
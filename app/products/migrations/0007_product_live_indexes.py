@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['-created_at', '-id'], name='product_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['price', 'id'], name='product_live_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['-rating_avg', '-id'], name='product_live_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['category', '-created_at', '-id'], name='product_live_category_idx'),
+        ),
+    ]
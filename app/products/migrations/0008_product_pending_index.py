@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_live_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at', 'id'], name='product_pending_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from common.models import TimeStampedModel
 from associations.models import Association, Artisan
 from users.models import User
@@ -29,6 +31,41 @@ class Product(TimeStampedModel):
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     STATUS_CHOICES = [('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    search_vector = SearchVectorField(null=True, editable=False)  # Maintained by products.search
+
+    # Denormalized review aggregates, maintained by products.services
+    rating_avg = models.FloatField(default=0, editable=False)
+    rating_count = models.IntegerField(default=0, editable=False)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    rating_1_count = models.IntegerField(default=0, editable=False)
+    rating_2_count = models.IntegerField(default=0, editable=False)
+    rating_3_count = models.IntegerField(default=0, editable=False)
+    rating_4_count = models.IntegerField(default=0, editable=False)
+    rating_5_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            models.Index(fields=['-rating_avg', '-id'], name='product_top_rated_idx'),
+            # Listing sorts, with the primary key tiebreak used by cursor pagination
+            models.Index(fields=['-created_at', '-id'], name='product_created_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_idx'),
+            models.Index(fields=['status', 'category'], name='product_status_category_idx'),
+            # Polymorphic owner lookups
+            models.Index(fields=['owner_type', 'owner_id'], name='product_owner_idx'),
+            # Storefront sorts over the approved (live) subset only
+            models.Index(fields=['-created_at', '-id'], name='product_live_created_idx', condition=models.Q(status='approved')),
+            models.Index(fields=['price', 'id'], name='product_live_price_idx', condition=models.Q(status='approved')),
+            models.Index(fields=['-rating_avg', '-id'], name='product_live_rating_idx', condition=models.Q(status='approved')),
+            models.Index(fields=['category', '-created_at', '-id'], name='product_live_category_idx', condition=models.Q(status='approved')),
+            # Moderation queue, oldest pending first
+            models.Index(fields=['created_at', 'id'], name='product_pending_idx', condition=models.Q(status='pending')),
+        ]
+
+    @property
+    def rating_histogram(self):
+        """Number of reviews per star, from 1 to 5."""
+        return [self.rating_1_count, self.rating_2_count, self.rating_3_count, self.rating_4_count, self.rating_5_count]
 
     def approve(self):
         """Approve the product."""
@@ -50,6 +87,12 @@ class ProductTranslation(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
 
+    class Meta:
+        indexes = [
+            # Serves the per-language translation prefetch: product_id IN (...) AND language_code IN (...)
+            models.Index(fields=['product', 'language_code'], name='product_translation_lang_idx'),
+        ]
+
 class ProductImage(models.Model):
     """Product image storage model."""
     product = models.ForeignKey(Product, related_name='images', on_delete=models.CASCADE)
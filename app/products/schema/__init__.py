@@ -3,9 +3,11 @@ from products.schema.product_schema import ProductQuery, ProductMutation
 from products.schema.favorites_schema import FavoritesQuery, FavoritesMutation
 from products.schema.reviews_schema import ReviewsQuery, ReviewsMutation
 from products.schema.category_schema import CategoryQuery, CategoryMutation
+from products.schema.search_schema import SearchQuery
+from products.schema.import_schema import ImportMutation
 
-class Query(ProductQuery, FavoritesQuery, ReviewsQuery, CategoryQuery, graphene.ObjectType):
+class Query(ProductQuery, FavoritesQuery, ReviewsQuery, CategoryQuery, SearchQuery, graphene.ObjectType):
     pass
 
-class Mutation(ProductMutation, FavoritesMutation, ReviewsMutation, CategoryMutation, graphene.ObjectType):
+class Mutation(ProductMutation, FavoritesMutation, ReviewsMutation, CategoryMutation, ImportMutation, graphene.ObjectType):
     pass
@@ -4,6 +4,7 @@ from products.models import Category
 from graphql import GraphQLError
 from graphql_jwt.decorators import login_required
 from typing import Optional
+from products.cache import cached_categories, invalidate_category_listings
 
 
 # ---------------- GraphQL Types ----------------
@@ -20,8 +21,8 @@ class CategoryQuery(graphene.ObjectType):
     category = graphene.Field(CategoryType, id=graphene.UUID(required=True))
     
     def resolve_all_categories(self, info):
-        """Fetch all product categories."""
-        return Category.objects.all()
+        """Fetch all product categories, cached until a category changes."""
+        return cached_categories(Category.objects.all)
     
     def resolve_category(self, info, id: str):
         """Fetch single category by ID."""
@@ -44,6 +45,7 @@ class CreateCategory(graphene.Mutation):
         """Create new category."""
         new_category = Category(name=name)
         new_category.save()
+        invalidate_category_listings()
         return CreateCategory(category=new_category)
 
 
@@ -67,6 +69,7 @@ class UpdateCategory(graphene.Mutation):
             category.name = name
         
         category.save()
+        invalidate_category_listings(category.id)
         return UpdateCategory(category=category)
 
 
@@ -83,6 +86,7 @@ class DeleteCategory(graphene.Mutation):
         try:
             category = Category.objects.get(id=id)
             category.delete()
+            invalidate_category_listings(id)
             return DeleteCategory(success=True)
         except Category.DoesNotExist:
             raise GraphQLError('Category not found')
@@ -0,0 +1,42 @@
+import graphene
+from graphql import GraphQLError
+from graphql_jwt.decorators import login_required
+from common.upload import Upload
+from products.importer import FORMATS, decode_lines, detect_format, import_products
+
+
+# ---------------- Types ----------------
+class ImportRowError(graphene.ObjectType):
+    row = graphene.Int()
+    message = graphene.String()
+
+# ---------------- Mutations ----------------
+class ImportProducts(graphene.Mutation):
+    """Bulk-create products from an uploaded CSV or JSON Lines file."""
+    total = graphene.Int()
+    created = graphene.Int()
+    error_count = graphene.Int()
+    errors = graphene.List(ImportRowError)
+
+    class Arguments:
+        file = Upload(required=True)
+        format = graphene.String(description="csv or jsonl; detected from the file name when omitted")
+
+    @login_required
+    def mutate(self, info, file, format=None):
+        file_format = format or detect_format(getattr(file, 'name', ''))
+        if file_format not in FORMATS:
+            raise GraphQLError('Format must be csv or jsonl')
+        try:
+            result = import_products(decode_lines(file), file_format)
+        except UnicodeDecodeError:
+            raise GraphQLError('File must be UTF-8 encoded')
+        return ImportProducts(
+            total=result.total,
+            created=result.created,
+            error_count=result.error_count,
+            errors=[ImportRowError(row=row, message=message) for row, message in result.errors]
+        )
+
+class ImportMutation(graphene.ObjectType):
+    import_products = ImportProducts.Field()
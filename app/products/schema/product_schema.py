@@ -4,7 +4,13 @@ from products.models import Product, Category, ProductTranslation, ProductImage
 from associations.models import Artisan, Association
 from graphql import GraphQLError
 from graphql_jwt.decorators import login_required
-from common.pagination import PaginationInput, PageInfo, paginate_queryset
+from common.pagination import PaginationInput, PageInfo, paginate_by_cursor
+from products.loaders import load_owner_name
+from products.filters import filter_products
+from products.facets import compute_facets
+from products.cache import cached_product_page, invalidate_product_listings
+from products.services import MAX_MODERATION_BATCH, MODERATION_ACTIONS, moderate_products
+from products.translations import language_chain, localize, localized_value, prefetch_localized
 from django.db.models import Q, QuerySet
 from typing import Optional
 
@@ -29,78 +35,182 @@ class ProductTranslationType(DjangoObjectType):
 class ProductType(DjangoObjectType):
     """GraphQL type for products with dynamic owner resolution."""
     owner = graphene.String()  # Dynamic Field (Artisan or Association)
+    rating_histogram = graphene.List(graphene.Int, description="Review counts for 1 to 5 stars")
 
     class Meta:
         model = Product
-        fields = ("id", "title", "description", "price", "stock_quantity", "owner_type", "category", "status", "translations", "images")
+        fields = ("id", "title", "description", "price", "stock_quantity", "owner_type", "category", "status", "translations", "images",
+                  "rating_avg", "rating_count")
 
     def resolve_owner(self, info):
         """Resolve product owner name based on owner_type.
         
         Returns artisan name or association name depending on owner_type.
+        Owners are batch-loaded per owner_type for every product in the page.
         """
-        if self.owner_type == 'artisan':
-            try:
-                artisan = Artisan.objects.select_related('user').get(user_id=self.owner_id)
-                return artisan.user.name
-            except Artisan.DoesNotExist:
-                return None
-        elif self.owner_type == 'association':
-            try:
-                association = Association.objects.get(id=self.owner_id)
-                return association.name
-            except Association.DoesNotExist:
-                return None
-        return None
+        return load_owner_name(info, self)
+
+    def resolve_title(self, info):
+        """Title in the language requested on the parent query, falling back to the base title."""
+        return localized_value(self, 'title')
+
+    def resolve_description(self, info):
+        return localized_value(self, 'description')
+
+class FacetCount(graphene.ObjectType):
+    """Number of matching products sharing one facet value."""
+    value = graphene.String()
+    label = graphene.String()
+    count = graphene.Int()
+
+class ProductFacets(graphene.ObjectType):
+    """Facet counts over every product matching the filters."""
+    categories = graphene.List(FacetCount)
+    owner_types = graphene.List(FacetCount)
+    price_ranges = graphene.List(FacetCount)
+    ratings = graphene.List(FacetCount)
+
+# ---------------- Input Object Types ----------------
+class ProductFilterInput(graphene.InputObjectType):
+    """Combined filters for product listings."""
+    price_min = graphene.Float()
+    price_max = graphene.Float()
+    owner_type = graphene.String()
+    status = graphene.String()
+    min_rating = graphene.Float()
+    category_ids = graphene.List(graphene.UUID)
 
 # ---------------- Paginated Products Type ----------------
 class PaginatedProducts(graphene.ObjectType):
     products = graphene.List(ProductType)
     page_info = graphene.Field(PageInfo)
+    facets = graphene.Field(ProductFacets)
+
+    facet_queryset = None
+
+    def resolve_facets(self, info):
+        """Compute facets only when selected, in a single aggregation pass."""
+        if self.facet_queryset is None:
+            return None
+        facets = compute_facets(self.facet_queryset)
+        return ProductFacets(
+            categories=[FacetCount(**facet) for facet in facets['category']],
+            owner_types=[FacetCount(**facet) for facet in facets['owner_type']],
+            price_ranges=[FacetCount(**facet) for facet in facets['price_range']],
+            ratings=[FacetCount(**facet) for facet in facets['rating']]
+        )
 
 # ---------------- Queries ----------------
+SORT_OPTIONS = {
+    'price_asc': 'price',
+    'price_desc': '-price',
+    'newest': '-created_at',
+    'oldest': 'created_at',
+    'top_rated': '-rating_avg'
+}
+
+def list_products(queryset: QuerySet, pagination: Optional[PaginationInput], category_id: Optional[str],
+                  sort_by: Optional[str], filters: Optional[ProductFilterInput], language: Optional[str],
+                  listing: str) -> PaginatedProducts:
+    """Filter, sort and paginate a product listing, served from the listing cache when possible."""
+    if pagination is None:
+        pagination = PaginationInput()
+
+    # Optimize query with select_related and prefetch_related.
+    # With a language, only the matching translations are fetched.
+    chain = language_chain(language)
+    queryset = queryset.select_related('category').prefetch_related('images').defer('search_vector')
+    queryset = prefetch_localized(queryset, chain) if language else queryset.prefetch_related('translations')
+
+    # Filter by category
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    queryset = filter_products(queryset, filters)
+
+    # Apply sorting
+    if sort_by and sort_by in SORT_OPTIONS:
+        queryset = queryset.order_by(SORT_OPTIONS[sort_by])
+
+    # Paginate results, served from the versioned listing cache when possible
+    category_ids = [category_id] if category_id else []
+    if filters and filters.category_ids:
+        category_ids += filters.category_ids
+    arguments = {'listing': listing, 'pagination': pagination, 'category_id': category_id, 'sort_by': sort_by,
+                 'filters': filters, 'language': chain}
+    paginated_products, page_info = cached_product_page(queryset, pagination, category_ids, arguments)
+    localize(paginated_products, chain)
+    result = PaginatedProducts(products=paginated_products, page_info=page_info)
+    result.facet_queryset = queryset
+    return result
+
 class ProductQuery(graphene.ObjectType):
     all_products = graphene.Field(
         PaginatedProducts, 
         pagination=PaginationInput(),
         category_id=graphene.UUID(),
-        sort_by=graphene.String()
+        sort_by=graphene.String(),
+        filters=ProductFilterInput(),
+        language=graphene.String(description="Resolve title and description in this language")
+    )
+    storefront_products = graphene.Field(
+        PaginatedProducts,
+        pagination=PaginationInput(),
+        category_id=graphene.UUID(),
+        sort_by=graphene.String(default_value='newest'),
+        filters=ProductFilterInput(),
+        language=graphene.String(),
+        description="Approved products only, for the public storefront"
     )
-    product = graphene.Field(ProductType, id=graphene.UUID(required=True))
+    moderation_queue = graphene.Field(
+        PaginatedProducts,
+        first=graphene.Int(),
+        after=graphene.String(),
+        description="Pending products, oldest first, for platform admins"
+    )
+    product = graphene.Field(ProductType, id=graphene.UUID(required=True), language=graphene.String())
 
     def resolve_all_products(self, info, pagination: Optional[PaginationInput] = None, 
-                           category_id: Optional[str] = None, sort_by: Optional[str] = None) -> PaginatedProducts:
-        """Fetch products with filtering and sorting options."""
-        if pagination is None:
-            pagination = PaginationInput()
-        
-        # Optimize query with select_related and prefetch_related
-        queryset = Product.objects.select_related('category').prefetch_related('translations', 'images').all()
-        
-        # Filter by category
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        
-        # Apply sorting
-        sort_options = {
-            'price_asc': 'price',
-            'price_desc': '-price',
-            'newest': '-created_at',
-            'oldest': 'created_at'
-        }
-        
-        if sort_by and sort_by in sort_options:
-            queryset = queryset.order_by(sort_options[sort_by])
-        
-        # Paginate results
-        paginated_products, page_info = paginate_queryset(queryset, pagination)
-        return PaginatedProducts(products=paginated_products, page_info=page_info)
+                           category_id: Optional[str] = None, sort_by: Optional[str] = None,
+                           filters: Optional[ProductFilterInput] = None,
+                           language: Optional[str] = None) -> PaginatedProducts:
+        """Fetch products in every status with filtering and sorting options (admin catalog)."""
+        return list_products(Product.objects.all(), pagination, category_id, sort_by, filters, language, 'catalog')
+
+    def resolve_storefront_products(self, info, pagination: Optional[PaginationInput] = None,
+                                    category_id: Optional[str] = None, sort_by: Optional[str] = None,
+                                    filters: Optional[ProductFilterInput] = None,
+                                    language: Optional[str] = None) -> PaginatedProducts:
+        """Fetch approved products only, read through the partial indexes on the live subset."""
+        return list_products(Product.objects.filter(status='approved'), pagination, category_id,
+                             sort_by or 'newest', filters, language, 'storefront')
 
-    def resolve_product(self, info, id):
+    @login_required
+    def resolve_moderation_queue(self, info, first: Optional[int] = None, after: Optional[str] = None) -> PaginatedProducts:
+        """Fetch the next pending products by cursor, oldest first.
+
+        Each page is a range scan on the pending products partial index,
+        so it costs the same at any depth of the backlog.
+        """
+        if info.context.user.role != 'platform_admin':
+            raise GraphQLError('Only platform admins can view the moderation queue')
+        queryset = (
+            Product.objects.filter(status='pending')
+            .select_related('category')
+            .prefetch_related('images')
+            .defer('search_vector')
+            .order_by('created_at')
+        )
+        products, page_info = paginate_by_cursor(queryset, first, after)
+        return PaginatedProducts(products=products, page_info=page_info)
+
+    def resolve_product(self, info, id, language=None):
+        chain = language_chain(language)
         try:
-            return Product.objects.get(id=id)
+            product = prefetch_localized(Product.objects.defer('search_vector'), chain).get(id=id)
         except Product.DoesNotExist:
             raise GraphQLError('Product not found')
+        localize([product], chain)
+        return product
 
 # ---------------- Mutations ----------------
 class CreateProduct(graphene.Mutation):
@@ -149,6 +259,7 @@ class CreateProduct(graphene.Mutation):
             category=validated_category
         )
         new_product.save()
+        invalidate_product_listings(new_product.category_id)
         return CreateProduct(product=new_product)
 
 class UpdateProduct(graphene.Mutation):
@@ -170,6 +281,7 @@ class UpdateProduct(graphene.Mutation):
         except Product.DoesNotExist:
             raise GraphQLError('Product not found')
 
+        previous_category_id = product.category_id
         if title: product.title = title
         if description: product.description = description
         if price: product.price = price
@@ -184,6 +296,7 @@ class UpdateProduct(graphene.Mutation):
                 raise GraphQLError('Category not found')
 
         product.save()
+        invalidate_product_listings(previous_category_id, product.category_id)
         return UpdateProduct(product=product)
 
 class DeleteProduct(graphene.Mutation):
@@ -197,6 +310,7 @@ class DeleteProduct(graphene.Mutation):
         try:
             product = Product.objects.get(id=id)
             product.delete()
+            invalidate_product_listings(product.category_id)
             return DeleteProduct(success=True)
         except Product.DoesNotExist:
             raise GraphQLError('Product not found')
@@ -216,6 +330,7 @@ class ApproveProduct(graphene.Mutation):
         try:
             product = Product.objects.get(id=id)
             product.approve()
+            invalidate_product_listings(product.category_id)
             return ApproveProduct(product=product)
         except Product.DoesNotExist:
             raise GraphQLError('Product not found')
@@ -235,10 +350,40 @@ class RejectProduct(graphene.Mutation):
         try:
             product = Product.objects.get(id=id)
             product.reject()
+            invalidate_product_listings(product.category_id)
             return RejectProduct(product=product)
         except Product.DoesNotExist:
             raise GraphQLError('Product not found')
 
+class ModerationOutcome(graphene.ObjectType):
+    id = graphene.UUID()
+    outcome = graphene.String(description="updated, unchanged or not_found")
+
+class BulkModerateProducts(graphene.Mutation):
+    """Approve or reject many products at once."""
+    updated_count = graphene.Int()
+    outcomes = graphene.List(ModerationOutcome)
+
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.UUID), required=True)
+        action = graphene.String(required=True, description="approve or reject")
+
+    @login_required
+    def mutate(self, info, ids, action):
+        user = info.context.user
+        if user.role != 'platform_admin':
+            raise GraphQLError('Only platform admins can moderate products')
+        if action not in MODERATION_ACTIONS:
+            raise GraphQLError('Action must be approve or reject')
+        if len(ids) > MAX_MODERATION_BATCH:
+            raise GraphQLError(f'At most {MAX_MODERATION_BATCH} products can be moderated at once')
+
+        outcomes = moderate_products(ids, MODERATION_ACTIONS[action])
+        return BulkModerateProducts(
+            updated_count=sum(outcome == 'updated' for outcome in outcomes.values()),
+            outcomes=[ModerationOutcome(id=product_id, outcome=outcome) for product_id, outcome in outcomes.items()]
+        )
+
 # ---------------- Mutation Class ----------------
 class ProductMutation(graphene.ObjectType):
     create_product = CreateProduct.Field()
@@ -246,3 +391,4 @@ class ProductMutation(graphene.ObjectType):
     delete_product = DeleteProduct.Field()
     approve_product = ApproveProduct.Field()
     reject_product = RejectProduct.Field()
+    bulk_moderate_products = BulkModerateProducts.Field()
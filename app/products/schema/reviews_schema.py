@@ -5,6 +5,8 @@ from products.review_model import Review
 from users.models import User
 from graphql import GraphQLError
 from graphql_jwt.decorators import login_required
+from django.db import transaction
+from products.services import add_review_rating, remove_review_rating, RATING_VALUES
 
 # -------- Type --------
 class ReviewType(DjangoObjectType):
@@ -37,7 +39,12 @@ class AddReview(graphene.Mutation):
         except (User.DoesNotExist, Product.DoesNotExist):
             raise GraphQLError('Buyer or Product not found')
 
-        review = Review.objects.create(buyer=buyer, product=product, rating=rating, comment=comment)
+        if rating not in RATING_VALUES:
+            raise GraphQLError('Rating must be between 1 and 5')
+
+        with transaction.atomic():
+            review = Review.objects.create(buyer=buyer, product=product, rating=rating, comment=comment)
+            add_review_rating(product.id, rating)
         return AddReview(review=review)
 
 class DeleteReview(graphene.Mutation):
@@ -50,11 +57,16 @@ class DeleteReview(graphene.Mutation):
     def mutate(self, info, review_id):
         try:
             review = Review.objects.get(id=review_id)
-            review.delete()
-            return DeleteReview(success=True)
         except Review.DoesNotExist:
             raise GraphQLError('Review not found')
 
+        with transaction.atomic():
+            # Only the request that actually deletes the row updates the aggregates
+            deleted, _ = Review.objects.filter(id=review.id).delete()
+            if deleted:
+                remove_review_rating(review.product_id, review.rating)
+        return DeleteReview(success=True)
+
 class ReviewsMutation:
     add_review = AddReview.Field()
     delete_review = DeleteReview.Field()
@@ -0,0 +1,28 @@
+import graphene
+from products.models import Product
+from products.schema.product_schema import PaginatedProducts
+from products.search import search_products
+from common.pagination import PaginationInput, paginate_queryset
+from typing import Optional
+
+
+# ---------------- Queries ----------------
+class SearchQuery(graphene.ObjectType):
+    search_products = graphene.Field(
+        PaginatedProducts,
+        query=graphene.String(required=True),
+        language=graphene.String(),
+        pagination=PaginationInput()
+    )
+
+    def resolve_search_products(self, info, query: str, language: Optional[str] = None,
+                                pagination: Optional[PaginationInput] = None) -> PaginatedProducts:
+        """Full-text search over product titles, descriptions and translations, ranked by relevance."""
+        if pagination is None:
+            pagination = PaginationInput()
+
+        queryset = Product.objects.select_related('category').prefetch_related('translations', 'images')
+        queryset = search_products(queryset, query, language)
+
+        paginated_products, page_info = paginate_queryset(queryset, pagination)
+        return PaginatedProducts(products=paginated_products, page_info=page_info)
@@ -0,0 +1,104 @@
+import threading
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import F, FloatField, QuerySet
+from django.db.models.functions import Cast
+from typing import Iterable, Optional
+from products.models import Product, ProductTranslation
+
+# Postgres text search configuration per ProductTranslation.language_code
+SEARCH_CONFIGS = getattr(settings, 'PRODUCT_SEARCH_CONFIGS', {
+    'en': 'english',
+    'fr': 'french',
+    'ar': 'arabic',
+})
+# Language of the base Product.title/description fields
+BASE_LANGUAGE = getattr(settings, 'PRODUCT_SEARCH_BASE_LANGUAGE', 'en')
+FALLBACK_CONFIG = 'simple'
+
+
+def search_config(language_code: Optional[str]) -> str:
+    """Return the text search configuration for a language code such as 'fr' or 'fr-MA'."""
+    language = (language_code or '').split('-')[0].lower()
+    return SEARCH_CONFIGS.get(language, FALLBACK_CONFIG)
+
+
+def _translation_config_sql():
+    """SQL CASE mapping a translation row's language_code to its regconfig."""
+    whens = ' '.join('WHEN %s THEN %s' for _ in SEARCH_CONFIGS)
+    params = [value for item in SEARCH_CONFIGS.items() for value in item]
+    sql = f"(CASE lower(split_part(t.language_code, '-', 1)) {whens} ELSE %s END)::regconfig"
+    return sql, params + [FALLBACK_CONFIG]
+
+
+def update_search_vectors(product_ids: Optional[Iterable] = None) -> int:
+    """Rebuild search_vector for the given products (all products if None).
+
+    Product title/description and every ProductTranslation row are combined
+    in a single set-based UPDATE, each translation stemmed with the
+    configuration of its own language. Titles weigh more than descriptions.
+    """
+    config_sql, config_params = _translation_config_sql()
+    sql = f"""
+        UPDATE {Product._meta.db_table} AS p SET search_vector =
+            setweight(to_tsvector(%s::regconfig, coalesce(p.title, '')), 'A')
+            || setweight(to_tsvector(%s::regconfig, coalesce(p.description, '')), 'B')
+            || coalesce((
+                SELECT tsvector_agg(
+                    setweight(to_tsvector({config_sql}, coalesce(t.title, '')), 'A')
+                    || setweight(to_tsvector({config_sql}, coalesce(t.description, '')), 'B')
+                )
+                FROM {ProductTranslation._meta.db_table} AS t
+                WHERE t.product_id = p.id
+            ), ''::tsvector)
+    """
+    base_config = search_config(BASE_LANGUAGE)
+    params = [base_config, base_config] + config_params * 2
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        sql += ' WHERE p.id = ANY(%s)'
+        params.append(product_ids)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+_pending = threading.local()
+
+
+def _reindex_pending() -> None:
+    product_ids, _pending.product_ids = getattr(_pending, 'product_ids', set()), set()
+    if product_ids:
+        update_search_vectors(product_ids)
+
+
+def reindex_on_commit(product_id) -> None:
+    """Refresh a product's search vector once the current transaction commits.
+
+    Products changed together are reindexed in a single UPDATE by whichever
+    commit callback runs first; the others find nothing left to do. Products
+    deleted before the commit simply match no row.
+    """
+    if not hasattr(_pending, 'product_ids'):
+        _pending.product_ids = set()
+    _pending.product_ids.add(product_id)
+    transaction.on_commit(_reindex_pending)
+
+
+def search_products(queryset: QuerySet, query: str, language: Optional[str] = None) -> QuerySet:
+    """Filter queryset to products matching query, best matches first.
+
+    The query is parsed with the configuration of the requested language and
+    matched against the GIN-indexed search_vector.
+    """
+    search_query = SearchQuery(query, config=search_config(language or BASE_LANGUAGE), search_type='websearch')
+    return (
+        queryset.filter(search_vector=search_query)
+        # Cast the real ts_rank to double precision so rank cursors compare exactly
+        .annotate(rank=Cast(SearchRank(F('search_vector'), search_query), FloatField()))
+        .order_by('-rank', 'pk')
+    )
@@ -0,0 +1,128 @@
+from django.db import connection
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from typing import Dict, Iterable, Optional
+from common.counts import bump_model_version
+from products.cache import invalidate_product_listings
+from products.models import Product
+from products.review_model import Review
+
+RATING_VALUES = range(1, 6)
+
+# Product status set by each moderation action
+MODERATION_ACTIONS = {'approve': 'approved', 'reject': 'rejected'}
+MAX_MODERATION_BATCH = 1000
+
+
+def _rating_delta(rating: int, step: int) -> dict:
+    """Update expressions shifting a product's rating aggregates by one review."""
+    new_count = F('rating_count') + step
+    new_sum = F('rating_sum') + step * rating
+    return {
+        'rating_count': new_count,
+        'rating_sum': new_sum,
+        f'rating_{rating}_count': F(f'rating_{rating}_count') + step,
+        'rating_avg': Case(
+            When(**{'rating_count__lte': -step}, then=Value(0.0)),
+            default=Cast(new_sum, FloatField()) / new_count,
+            output_field=FloatField(),
+        ),
+    }
+
+
+def _shift_rating(product_id, rating: int, step: int) -> None:
+    Product.objects.filter(pk=product_id).update(**_rating_delta(rating, step))
+    bump_model_version(Product)
+    # Cached listings show the aggregates and sort by them
+    invalidate_product_listings(Product.objects.filter(pk=product_id).values_list('category_id', flat=True).first())
+
+
+def add_review_rating(product_id, rating: int) -> None:
+    """Count a new review in the product's rating aggregates with one atomic UPDATE."""
+    _shift_rating(product_id, rating, 1)
+
+
+def remove_review_rating(product_id, rating: int) -> None:
+    """Remove a deleted review from the product's rating aggregates with one atomic UPDATE."""
+    _shift_rating(product_id, rating, -1)
+
+
+def recompute_ratings(product_ids: Optional[Iterable] = None) -> int:
+    """Recompute rating aggregates from the reviews table in one set-based UPDATE.
+
+    Products without reviews are reset to zero. Returns the number of
+    products updated.
+    """
+    histogram_sql = ', '.join(
+        f'count(*) FILTER (WHERE rating = {value}) AS rating_{value}' for value in RATING_VALUES
+    )
+    assignments = ', '.join(
+        f'rating_{value}_count = coalesce(stats.rating_{value}, 0)' for value in RATING_VALUES
+    )
+    params = []
+    product_filter = ''
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        product_filter = 'AND target.id = ANY(%s)'
+        params.append(product_ids)
+
+    sql = f"""
+        WITH updated AS (
+            UPDATE {Product._meta.db_table} AS p SET
+                rating_count = coalesce(stats.total, 0),
+                rating_sum = coalesce(stats.rating_sum, 0),
+                rating_avg = coalesce(stats.rating_sum::double precision / nullif(stats.total, 0), 0),
+                {assignments}
+            FROM {Product._meta.db_table} AS target
+            LEFT JOIN (
+                SELECT product_id, count(*) AS total, sum(rating) AS rating_sum, {histogram_sql}
+                FROM {Review._meta.db_table}
+                GROUP BY product_id
+            ) AS stats ON stats.product_id = target.id
+            WHERE p.id = target.id {product_filter}
+            RETURNING p.category_id
+        )
+        SELECT count(*), array_agg(DISTINCT category_id) FROM updated
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        updated, category_ids = cursor.fetchone()
+    bump_model_version(Product)
+    invalidate_product_listings(*(category_ids or ()))
+    return updated
+
+
+def moderate_products(product_ids: Iterable, status: str) -> Dict[str, str]:
+    """Set the status of many products with one set-based UPDATE.
+
+    Returns the outcome per requested id: 'updated', 'unchanged' when the
+    product already had the status, or 'not_found'. Listing caches and
+    counts are invalidated once for the whole batch.
+    """
+    product_ids = list(dict.fromkeys(str(product_id) for product_id in product_ids))
+    if not product_ids:
+        return {}
+    table = Product._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table} SET status = %s, updated_at = now()
+            WHERE id = ANY(%s::uuid[]) AND status <> %s
+            RETURNING id, category_id
+            """,
+            [status, product_ids, status],
+        )
+        updated = cursor.fetchall()
+    outcomes = {str(product_id): 'updated' for product_id, _ in updated}
+
+    remaining = [product_id for product_id in product_ids if product_id not in outcomes]
+    if remaining:
+        existing = {str(product_id) for product_id in Product.objects.filter(id__in=remaining).values_list('id', flat=True)}
+        outcomes.update({product_id: 'unchanged' if product_id in existing else 'not_found' for product_id in remaining})
+
+    if updated:
+        bump_model_version(Product)
+        invalidate_product_listings(*{category_id for _, category_id in updated})
+    return {product_id: outcomes[product_id] for product_id in product_ids}
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from products.models import Product, ProductTranslation
+from products.search import reindex_on_commit
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    """Refresh the search vector when a product's text may have changed."""
+    if update_fields is None or {'title', 'description'} & set(update_fields):
+        reindex_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=ProductTranslation)
+@receiver(post_delete, sender=ProductTranslation)
+def index_translation(sender, instance, origin=None, **kwargs):
+    """Refresh the search vector of the product a translation belongs to."""
+    if isinstance(origin, Product) and origin.pk == instance.product_id:
+        return  # Cascading from the product's own deletion
+    reindex_on_commit(instance.product_id)
@@ -1,3 +1,359 @@
+import csv
+import io
+import json
+import uuid
+from unittest import mock
+from django.core.management import CommandError, call_command
+from django.db import DataError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from common.testing import execute, isolated_cache, make_product, make_user
+from products import importer
+from products.importer import import_products
+from products.models import Category, Product, ProductTranslation
+from products.search import update_search_vectors
 
-# Create your tests here.
+STOREFRONT_QUERY = '''
+    query($categoryId: UUID) {
+        storefrontProducts(categoryId: $categoryId) { products { id ratingAvg ratingCount } }
+    }
+'''
+ADD_REVIEW = '''
+    mutation($buyerId: UUID!, $productId: UUID!) {
+        addReview(buyerId: $buyerId, productId: $productId, rating: 5) { review { id } }
+    }
+'''
+
+
+@isolated_cache
+class RatingListingCacheTests(TestCase):
+    def setUp(self):
+        self.buyer = make_user()
+        self.category = Category.objects.create(name='Pottery')
+        self.product = make_product(category=self.category)
+
+    def listed_rating(self, category_id=None):
+        result = execute(STOREFRONT_QUERY, variables={'categoryId': category_id})
+        self.assertIsNone(result.errors)
+        product, = result.data['storefrontProducts']['products']
+        return product['ratingAvg'], product['ratingCount']
+
+    def test_new_review_shows_in_cached_listings(self):
+        category_id = str(self.category.id)
+        self.assertEqual(self.listed_rating(), (0.0, 0))
+        self.assertEqual(self.listed_rating(category_id), (0.0, 0))
+
+        result = execute(ADD_REVIEW, user=self.buyer,
+                         variables={'buyerId': str(self.buyer.id), 'productId': str(self.product.id)})
+        self.assertIsNone(result.errors)
+
+        self.assertEqual(self.listed_rating(), (5.0, 1))
+        self.assertEqual(self.listed_rating(category_id), (5.0, 1))
+
+
+class ImportProductsTests(TestCase):
+    def setUp(self):
+        self.owner_id = str(make_product().owner_id)
+
+    def import_jsonl(self, *rows):
+        valid = {'title': 'Rug', 'price': 10, 'stock_quantity': 1, 'owner_type': 'artisan', 'owner_id': self.owner_id}
+        return import_products([json.dumps({**valid, **row}) for row in rows], 'jsonl')
+
+    def test_malformed_rows_are_reported_without_aborting_the_import(self):
+        long_url = 'https://img.example/' + 'a' * 200
+        result = self.import_jsonl(
+            {'images': 5},
+            {'translations': 'fr'},
+            {'translations': [{'language_code': 'x' * 11, 'title': 'Tapis'}]},
+            {'translations': [{'language_code': 'fr', 'title': 'T' * 256}]},
+            {'images': [long_url]},
+            {'description': 5},
+            {'stock_quantity': 10 ** 10},
+            {'title': 'Valid rug'},
+        )
+        self.assertEqual(result.errors, [
+            (1, 'images must be a list of URLs'),
+            (2, 'translations must be a list'),
+            (3, 'translation language_code must be at most 10 characters'),
+            (4, 'translation title must be at most 255 characters'),
+            (5, 'image URL must be at most 200 characters'),
+            (6, 'description must be a string'),
+            (7, 'price or stock_quantity is out of range'),
+        ])
+        self.assertEqual(result.created, 1)
+        self.assertTrue(Product.objects.filter(title='Valid rug').exists())
+
+    def test_rows_failing_on_insert_are_rejected_alone(self):
+        insert = importer._insert
+
+        def failing_insert(entries):
+            if any(product.title == 'Broken' for _, product, _, _ in entries):
+                raise DataError('value too long\nDETAIL: ...')
+            insert(entries)
+
+        with mock.patch('products.importer._insert', failing_insert):
+            result = self.import_jsonl({'title': 'First'}, {'title': 'Broken'}, {'title': 'Last'})
+        self.assertEqual(result.errors, [(2, 'Could not be saved: value too long')])
+        self.assertEqual(result.created, 2)
+        self.assertEqual(set(Product.objects.filter(title__in=['First', 'Broken', 'Last'])
+                             .values_list('title', flat=True)), {'First', 'Last'})
+
+    def test_errors_are_reported_in_row_order(self):
+        lines = [
+            'title,price,stock_quantity,owner_type,owner_id',
+            f'Rug,10,1,artisan,{uuid.uuid4()}',  # Found missing only when owners are looked up
+            f',10,1,artisan,{uuid.uuid4()}',
+            f'Vase,-1,1,artisan,{uuid.uuid4()}',
+        ]
+        result = import_products(lines, 'csv')
+        self.assertEqual(result.errors, [
+            (1, 'Artisan owner not found'),
+            (2, 'title is required'),
+            (3, 'price and stock_quantity must not be negative'),
+        ])
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.product = make_product(title='Handwoven rug')
+        ProductTranslation.objects.bulk_create(
+            ProductTranslation(product=self.product, language_code=f'x{index}', title=f'Tapis {index}')
+            for index in range(20)
+        )
+        update_search_vectors([self.product.pk])
+
+    def reindex_statements(self, change):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            change()
+        return [query['sql'] for query in queries.captured_queries if 'search_vector =' in query['sql']]
+
+    def test_translation_changes_reindex_once_on_commit(self):
+        self.product.refresh_from_db()
+        self.assertIn('tapi', self.product.search_vector)
+
+        def change():
+            for translation in ProductTranslation.objects.filter(product=self.product):
+                translation.delete()
+        self.assertEqual(len(self.reindex_statements(change)), 1)
+        self.product.refresh_from_db()
+        self.assertNotIn('tapi', self.product.search_vector)
+
+    def test_deleted_products_are_not_reindexed(self):
+        self.assertEqual(self.reindex_statements(self.product.delete), [])
+        self.assertFalse(Product.objects.filter(pk=self.product.pk).exists())
+
+
+class SearchProductsTests(TestCase):
+    SEARCH = '''
+        query($query: String!, $language: String, $after: String) {
+            searchProducts(query: $query, language: $language, pagination: {first: 3, after: $after}) {
+                products { id }
+                pageInfo { hasNextPage endCursor }
+            }
+        }
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title_match = make_product(title='Wool rug', description='Handwoven')
+        cls.description_match = make_product(title='Ceramic vase', description='Wrapped in wool')
+        cls.translated = make_product(title='Carpet', description='')
+        ProductTranslation.objects.create(product=cls.translated, language_code='fr', title='Tapis en laine')
+        cls.rugs = {str(make_product(title=f'Kilim rug {index}').pk) for index in range(7)} | {str(cls.title_match.pk)}
+        update_search_vectors()
+
+    def search(self, query, language=None, after=None):
+        result = execute(self.SEARCH, variables={'query': query, 'language': language, 'after': after})
+        self.assertIsNone(result.errors)
+        return result.data['searchProducts']
+
+    def test_title_matches_rank_above_description_matches(self):
+        ids = [product['id'] for product in self.search('wool')['products']]
+        self.assertEqual(ids, [str(self.title_match.pk), str(self.description_match.pk)])
+
+    def test_translations_are_matched_with_their_language(self):
+        ids = [product['id'] for product in self.search('laine', language='fr-MA')['products']]
+        self.assertEqual(ids, [str(self.translated.pk)])
+
+    def test_cursor_walk_returns_every_match_once(self):
+        seen, after = [], None
+        while True:
+            page = self.search('rug', after=after)
+            seen += [product['id'] for product in page['products']]
+            if not page['pageInfo']['hasNextPage']:
+                break
+            after = page['pageInfo']['endCursor']
+        self.assertEqual(len(seen), len(self.rugs))
+        self.assertEqual(set(seen), self.rugs)
+
+
+@isolated_cache
+class FacetCountTests(TestCase):
+    FACETS = '''
+        query($filters: ProductFilterInput) {
+            allProducts(filters: $filters) {
+                facets {
+                    categories { value count }
+                    ownerTypes { value count }
+                    priceRanges { value count }
+                    ratings { value count }
+                }
+            }
+        }
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rugs, cls.vases = Category.objects.create(name='Rugs'), Category.objects.create(name='Vases')
+        make_product(category=cls.rugs, price=20.0)
+        make_product(category=cls.rugs, price=60.0)
+        make_product(category=cls.rugs, price=300.0)
+        rated = make_product(category=cls.vases, price=30.0)
+        Product.objects.filter(pk=rated.pk).update(rating_count=2, rating_sum=9, rating_avg=4.5)
+
+    def facets(self, filters):
+        result = execute(self.FACETS, variables={'filters': filters})
+        self.assertIsNone(result.errors)
+        facets = result.data['allProducts']['facets']
+        return {name: {item['value']: item['count'] for item in values} for name, values in facets.items()}
+
+    def test_counts_follow_the_filters(self):
+        facets = self.facets({'priceMax': 100})
+        self.assertEqual(facets['categories'], {str(self.rugs.pk): 2, str(self.vases.pk): 1})
+        self.assertEqual(facets['ownerTypes'], {'artisan': 3})
+        self.assertEqual(facets['priceRanges'], {'0-50': 2, '50-100': 1})
+        self.assertEqual(facets['ratings'], {'4': 1, None: 2})  # None counts unrated products
+
+    def test_combined_filters_narrow_every_facet(self):
+        facets = self.facets({'categoryIds': [str(self.rugs.pk)], 'priceMin': 50})
+        self.assertEqual(facets['categories'], {str(self.rugs.pk): 2})
+        self.assertEqual(facets['priceRanges'], {'50-100': 1, '250-500': 1})
+        self.assertEqual(facets['ratings'], {None: 2})
+
+
+@isolated_cache
+class LanguageFallbackTests(TestCase):
+    PRODUCT = 'query($id: UUID!, $language: String) { product(id: $id, language: $language) { title description } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = make_product(title='Rug', description='Wool')
+        ProductTranslation.objects.create(product=cls.product, language_code='fr-MA', title='Tapis marocain',
+                                          description='')
+        ProductTranslation.objects.create(product=cls.product, language_code='fr', title='Tapis', description='Laine')
+
+    def localized(self, language):
+        result = execute(self.PRODUCT, variables={'id': str(self.product.id), 'language': language})
+        self.assertIsNone(result.errors)
+        return result.data['product']['title'], result.data['product']['description']
+
+    def test_regional_variant_falls_back_to_language_then_base(self):
+        self.assertEqual(self.localized('fr-MA'), ('Tapis marocain', 'Laine'))
+        self.assertEqual(self.localized('fr'), ('Tapis', 'Laine'))
+        self.assertEqual(self.localized('de-CH'), ('Rug', 'Wool'))
+        self.assertEqual(self.localized(None), ('Rug', 'Wool'))
+
+    def test_listing_loads_translations_in_one_query(self):
+        for index in range(5):
+            product = make_product()
+            ProductTranslation.objects.create(product=product, language_code='fr', title=f'Produit {index}')
+        query = '{ storefrontProducts(language: "fr-MA") { products { title } } }'
+        with CaptureQueriesContext(connection) as queries:
+            result = execute(query)
+        titles = [product['title'] for product in result.data['storefrontProducts']['products']]
+        self.assertIn('Tapis marocain', titles)
+        self.assertEqual(len([title for title in titles if title.startswith('Produit')]), 5)
+        translation_queries = [q for q in queries.captured_queries if 'products_producttranslation' in q['sql']]
+        self.assertEqual(len(translation_queries), 1)
+
+
+class ExportCatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.approved = [make_product(title=f'Rug {index}') for index in range(5)]
+        make_product(title='Pending rug', status='pending')
+        ProductTranslation.objects.create(product=cls.approved[0], language_code='fr', title='Tapis 0')
+
+    def test_csv_is_streamed_through_the_command_stdout(self):
+        writes = []
+
+        class RecordingOutput(io.StringIO):
+            def write(self, text):
+                writes.append(text)
+                return super().write(text)
+
+        output = RecordingOutput()
+        call_command('export_catalog', '--format', 'csv', '--chunk-size', '2', stdout=output)
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(sorted(row['title'] for row in rows), [f'Rug {index}' for index in range(5)])
+        translations = next(json.loads(row['translations']) for row in rows if row['id'] == str(self.approved[0].pk))
+        self.assertEqual(translations[0]['title'], 'Tapis 0')
+        self.assertGreater(len(writes), 1)  # One write per chunk, not one buffered document
+
+    def test_gzip_needs_a_binary_stdout(self):
+        with self.assertRaisesMessage(CommandError, 'binary stdout'):
+            call_command('export_catalog', '--gzip', stdout=io.StringIO())
+
+
+@isolated_cache
+class ModerationTests(TestCase):
+    MODERATE = '''
+        mutation($ids: [UUID!]!, $action: String!) {
+            bulkModerateProducts(ids: $ids, action: $action) { updatedCount outcomes { id outcome } }
+        }
+    '''
+    QUEUE = '''
+        query($after: String) {
+            moderationQueue(first: 2, after: $after) { products { id } pageInfo { hasNextPage endCursor } }
+        }
+    '''
+
+    def setUp(self):
+        self.admin = make_user('platform_admin')
+        self.pending = [make_product(status='pending') for _ in range(3)]
+        self.approved = make_product()
+
+    def moderate(self, ids, action='approve', user=None):
+        return execute(self.MODERATE, user=user or self.admin,
+                       variables={'ids': [str(product_id) for product_id in ids], 'action': action})
+
+    def test_outcomes_for_mixed_duplicate_and_unknown_ids(self):
+        unknown = uuid.uuid4()
+        result = self.moderate([self.pending[0].id, self.approved.id, unknown, self.pending[0].id])
+        self.assertIsNone(result.errors)
+        data = result.data['bulkModerateProducts']
+        self.assertEqual(data['updatedCount'], 1)
+        self.assertEqual(data['outcomes'], [
+            {'id': str(self.pending[0].id), 'outcome': 'updated'},
+            {'id': str(self.approved.id), 'outcome': 'unchanged'},
+            {'id': str(unknown), 'outcome': 'not_found'},
+        ])
+        self.assertEqual(Product.objects.get(pk=self.pending[0].pk).status, 'approved')
+
+    def test_only_platform_admins_can_moderate(self):
+        result = self.moderate([self.pending[0].id], user=make_user('buyer'))
+        self.assertEqual(result.errors[0].message, 'Only platform admins can moderate products')
+        anonymous = execute(self.MODERATE, variables={'ids': [str(self.pending[0].id)], 'action': 'approve'})
+        self.assertIsNotNone(anonymous.errors)
+        self.assertEqual(Product.objects.get(pk=self.pending[0].pk).status, 'pending')
+
+    def test_approval_shows_in_cached_storefront_listings(self):
+        storefront = '{ storefrontProducts { products { id } } }'
+        self.assertEqual(len(execute(storefront).data['storefrontProducts']['products']), 1)
+        self.moderate([product.id for product in self.pending])
+        self.assertEqual(len(execute(storefront).data['storefrontProducts']['products']), 4)
+
+    def test_queue_walks_pending_products_oldest_first(self):
+        seen, after = [], None
+        while True:
+            result = execute(self.QUEUE, user=self.admin, variables={'after': after})
+            self.assertIsNone(result.errors)
+            page = result.data['moderationQueue']
+            seen += [product['id'] for product in page['products']]
+            if not page['pageInfo']['hasNextPage']:
+                break
+            after = page['pageInfo']['endCursor']
+        self.assertEqual(seen, [str(product.id) for product in self.pending])
+
+        denied = execute(self.QUEUE, user=make_user('buyer'))
+        self.assertEqual(denied.errors[0].message, 'Only platform admins can view the moderation queue')
@@ -0,0 +1,54 @@
+from typing import Iterable, List, Optional
+from django.db.models import Prefetch, QuerySet
+from django.db.models.functions import Lower
+from products.models import Product, ProductTranslation
+from products.search import BASE_LANGUAGE
+
+# Attribute holding the prefetched translations matching the requested language
+LOCALIZED_ATTR = 'localized_translations'
+CHAIN_ATTR = 'language_chain'
+
+
+def language_chain(language: Optional[str]) -> List[str]:
+    """Translation languages to try, most specific first: 'fr-MA' gives ['fr-ma', 'fr'].
+
+    The base language is stored on Product itself and needs no translation.
+    """
+    if not language:
+        return []
+    language = language.lower()
+    chain = [language, language.split('-')[0]]
+    return [code for code in dict.fromkeys(chain) if code != BASE_LANGUAGE]
+
+
+def prefetch_localized(queryset: QuerySet, chain: List[str]) -> QuerySet:
+    """Prefetch only the translation rows in the language chain, in one query.
+
+    Codes are compared lowercased, as stored codes keep their case ('fr-MA').
+    """
+    if not chain:
+        return queryset
+    return queryset.prefetch_related(Prefetch(
+        'translations',
+        queryset=ProductTranslation.objects.alias(code=Lower('language_code')).filter(code__in=chain),
+        to_attr=LOCALIZED_ATTR,
+    ))
+
+
+def localize(products: Iterable[Product], chain: List[str]) -> None:
+    """Record the language chain on products so title/description resolve through it."""
+    for product in products:
+        setattr(product, CHAIN_ATTR, chain)
+
+
+def localized_value(product: Product, field: str) -> str:
+    """Return field from the first translation in the chain that has it, else the base value."""
+    chain = getattr(product, CHAIN_ATTR, None)
+    translations = getattr(product, LOCALIZED_ATTR, None)
+    if chain and translations:
+        by_language = {translation.language_code.lower(): translation for translation in translations}
+        for code in chain:
+            translation = by_language.get(code)
+            if translation is not None and getattr(translation, field):
+                return getattr(translation, field)
+    return getattr(product, field)
@@ -1,3 +1,36 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from products.export import CONTENT_TYPES, EXPORT_FORMATS, export_catalog
 
-# Create your views here.
+CATALOG_EXPORT_TOKEN = getattr(settings, 'CATALOG_EXPORT_TOKEN', None)
+
+
+@require_GET
+def catalog_export(request):
+    """Stream the approved catalog.
+
+    Query parameters: format (jsonl or csv), updated_since (ISO 8601) and
+    gzip=1. When CATALOG_EXPORT_TOKEN is set it must be sent as a bearer token.
+    """
+    if CATALOG_EXPORT_TOKEN and request.headers.get('Authorization') != f'Bearer {CATALOG_EXPORT_TOKEN}':
+        return HttpResponseForbidden()
+
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('format must be jsonl or csv')
+    updated_since = None
+    if request.GET.get('updated_since'):
+        updated_since = parse_datetime(request.GET['updated_since'])
+        if updated_since is None:
+            return HttpResponseBadRequest('updated_since must be an ISO 8601 datetime')
+    compress = request.GET.get('gzip') in ('1', 'true')
+
+    filename = f'catalog.{file_format}' + ('.gz' if compress else '')
+    response = StreamingHttpResponse(
+        export_catalog(file_format, updated_since, compress),
+        content_type='application/gzip' if compress else f'{CONTENT_TYPES[file_format]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response